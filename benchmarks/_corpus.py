@@ -0,0 +1,61 @@
+"""Shared helpers for the benchmark scripts: makes `src` importable and loads the frame corpus."""
+
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+SRC_DIR = Path(__file__).parents[1] / "src"
+if SRC_DIR.as_posix() not in sys.path:
+    sys.path.insert(0, SRC_DIR.as_posix())
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def load_corpus(directory: str | None, size: tuple[int, int] = (1920, 1080)) -> list[MatLike]:
+    """Loads every image in `directory` (sorted by name, so the corpus is fixed). Without a
+    directory a deterministic synthetic corpus of QR codes on a noisy background is generated."""
+    if directory is not None:
+        paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        frames = [frame for p in paths if (frame := cv2.imread(p.as_posix())) is not None]
+        if not frames:
+            raise SystemExit(f'No images found in "{directory}"')
+        return frames
+    return synthetic_corpus(size)
+
+
+def synthetic_corpus(size: tuple[int, int], count: int = 20) -> list[MatLike]:
+    width, height = size
+    rng = np.random.default_rng(0)
+    encoder = cv2.QRCodeEncoder.create()
+    frames: list[MatLike] = []
+    for i in range(count):
+        frame = rng.integers(90, 170, (height, width, 3), dtype=np.uint8)
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+        code = encoder.encode(f"PBC-{i:05d}")
+        side = int(height * rng.uniform(0.15, 0.35))
+        code = cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST)
+        code = cv2.copyMakeBorder(code, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+        h, w = code.shape[:2]
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        frame[y : y + h, x : x + w] = cv2.cvtColor(code, cv2.COLOR_GRAY2BGR)
+        frames.append(frame)
+    return frames
+
+
+def time_per_frame(
+    frames: list[MatLike], func: Callable[[MatLike], object], rounds: int = 3
+) -> float:
+    "Returns the best average seconds per frame over `rounds` passes."
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for frame in frames:
+            _ = func(frame)
+        best = min(best, (time.perf_counter() - start) / len(frames))
+    return best
@@ -0,0 +1,40 @@
+"""Times every decoder backend on a fixed frame corpus at a few scales, the same shoot-out the
+"auto" decoder_backend setting runs on recent frames.
+
+    uv run python benchmarks/bench_backends.py [CORPUS_DIR] [--scales 0.5 1.0]
+"""
+
+import argparse
+
+import cv2
+from _corpus import load_corpus
+
+from detection import BACKENDS, calibrate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--scales", nargs="+", type=float, default=[0.25, 0.5, 1.0])
+    _ = parser.add_argument("--symbologies", nargs="+", default=None)
+    args = parser.parse_args()
+
+    frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in load_corpus(args.corpus)]
+    backends = [backend() for backend in BACKENDS]
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    for scale in args.scales:
+        images = [
+            cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if scale < 1.0
+            else frame
+            for frame in frames
+        ]
+        fastest, results = calibrate(images, backends, args.symbologies)
+        print(f"\nscale x{scale} -> {fastest.name}")
+        for name, (seconds, reads) in results.items():
+            print(f"  {name:<10} {seconds * 1000:8.2f} ms/frame  {reads} codes read")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compares sending frames to the Flask capturer as base64 data URLs (what the page used to send)
+with sending the JPEG bytes as binary, through the real `frame` handler over Socket.IO's test
+client (loopback, no network). Reports payload size, frames/s and CPU time per frame.
+
+    uv run python benchmarks/bench_flask_transport.py [CORPUS_DIR] [--seconds 5]
+"""
+
+import argparse
+import base64
+import time
+
+import cv2
+from _corpus import load_corpus
+from cv2.typing import MatLike
+
+from flask_app.app import app, set_callback, socketio
+
+
+def run(name: str, payloads: list[bytes] | list[str], seconds: float) -> None:
+    received = 0
+
+    def on_frame(_frame: MatLike) -> None:
+        nonlocal received
+        received += 1
+
+    set_callback(on_frame)
+    client = socketio.test_client(app)  # pyright: ignore[reportUnknownMemberType]
+    sent = 0
+    start, cpu_start = time.perf_counter(), time.process_time()
+    while time.perf_counter() - start < seconds:
+        client.emit("frame", payloads[sent % len(payloads)])  # pyright: ignore[reportUnknownMemberType]
+        sent += 1
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    client.disconnect()  # pyright: ignore[reportUnknownMemberType]
+
+    size = sum(len(payload) for payload in payloads) / len(payloads)
+    print(
+        f"{name:<9} {size / 1024:6.1f} KB/frame  {received / elapsed:7.1f} frames/s  "
+        f"{cpu / sent * 1000:6.2f} ms CPU/frame"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    # what the page sends: 640x480 canvas, JPEG quality 0.5
+    jpegs = [
+        cv2.imencode(".jpg", cv2.resize(frame, (640, 480)), [cv2.IMWRITE_JPEG_QUALITY, 50])[
+            1
+        ].tobytes()
+        for frame in load_corpus(args.corpus)
+    ]
+    data_urls = [f"data:image/jpeg;base64,{base64.b64encode(jpeg).decode()}" for jpeg in jpegs]
+
+    run("data URL", data_urls, args.seconds)
+    run("binary", jpegs, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compares allocating a new array per captured frame with reading into a `FramePool`.
+
+Frames from the corpus are "captured" at a fixed rate and fed through a `DecodeEngine` whose
+detector only sleeps, so the numbers show the capture and hand-off cost alone. Each mode runs in
+its own process, so the peak resident memory of one doesn't hide the other's.
+
+    uv run python benchmarks/bench_frame_pool.py [CORPUS_DIR] [--fps 60] [--seconds 5]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from _corpus import load_corpus
+from cv2.typing import MatLike
+
+from detection import DecodeEngine
+from frame_pool import FramePool, release
+
+
+def run(
+    frames: list[MatLike], use_pool: bool, fps: float, seconds: float, decode_ms: float
+) -> None:
+    def detect(_frame: MatLike) -> list[object]:
+        time.sleep(decode_ms / 1000)
+        return []
+
+    engine = DecodeEngine(lambda: detect, workers=2)  # pyright: ignore[reportArgumentType]
+    engine.start()
+    pool = FramePool() if use_pool else None
+    allocated = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    while (elapsed := time.perf_counter() - start) < seconds:
+        source = frames[count % len(frames)]
+        buffer = pool.acquire(source.shape, source.dtype) if pool is not None else None
+        if buffer is None:
+            # what camera.read() does without a buffer to read into
+            buffer = np.empty_like(source)
+            allocated += 1
+        np.copyto(buffer, source)
+        engine.submit(buffer)
+        release(buffer)
+        count += 1
+        time.sleep(max(0.0, count / fps - elapsed))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    engine.stop()
+
+    allocated_mb = allocated * frames[0].nbytes / 2**20
+    line = (
+        f"{'pool' if use_pool else 'plain':<6} "
+        f"{allocated / seconds:6.1f} frame allocations/s ({allocated_mb / seconds:7.1f} MB/s)  "
+        f"traced peak {peak / 2**20:7.1f} MB"
+    )
+    try:
+        import resource  # not available on Windows
+
+        # kilobytes on Linux
+        line += f"  peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:7.1f} MB"
+    except ImportError:
+        pass
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--fps", type=float, default=60)
+    _ = parser.add_argument("--seconds", type=float, default=5)
+    _ = parser.add_argument("--decode-ms", type=float, default=25, help="simulated decode time")
+    _ = parser.add_argument("--mode", choices=["plain", "pool"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is None:
+        for mode in ("plain", "pool"):
+            _ = subprocess.run([sys.executable, *sys.argv, "--mode", mode], check=True)
+        return
+
+    frames = load_corpus(args.corpus)
+    run(frames, args.mode == "pool", args.fps, args.seconds, args.decode_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Replays a recorded session, a video file or a directory of frames through the full detection
+pipeline, headless, with the same `FileCapturer` and `DecodeEngine` wiring the app uses, and
+reports the throughput.
+
+"fast" pacing measures how many frames per second the pipeline decodes one after the other;
+"realtime" pacing shows how many frames of the original recording would be decoded live, where
+`--workers` decodes several at once.
+
+    uv run python benchmarks/bench_replay.py [SOURCE] [--pacing fast] [--workers 1]
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+from _corpus import load_corpus
+from cv2.typing import MatLike
+
+from capture_api import FileCapturer
+from detect_code import Detection
+from detection import DecodeEngine, DetectionPipeline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("source", nargs="?", help="session, video file or directory of frames")
+    _ = parser.add_argument("--pacing", choices=["fast", "realtime"], default="fast")
+    _ = parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source: str | None = args.source
+        if source is None:
+            for i, frame in enumerate(load_corpus(None)):
+                _ = cv2.imwrite((Path(temp_dir) / f"{i:04}.png").as_posix(), frame)
+            source = temp_dir
+
+        engine = DecodeEngine(DetectionPipeline, workers=args.workers)
+        lock = threading.Lock()
+        submitted = 0
+        decoded = 0
+        codes: set[str] = set()
+
+        def on_frame(frame: MatLike) -> None:
+            nonlocal submitted
+            submitted += 1
+            engine.submit(frame)
+
+        def on_result(detections: list[Detection], _frame: MatLike, _source: str) -> None:
+            nonlocal decoded
+            with lock:
+                decoded += 1
+                codes.update(detection.data for detection in detections)
+
+        engine.set_result_callback(on_result)
+        capturer = FileCapturer()
+        capturer.set_frame_callback(on_frame)
+        capturer.set_option(f"{source} ({args.pacing})")
+
+        engine.start()
+        start = time.perf_counter()
+        capturer.start_capturing()
+        _ = capturer.finished.wait()
+        capturer.stop_capturing()
+        engine.stop()
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"{submitted} frames replayed ({args.pacing}), {decoded} decoded in {elapsed:.2f}s "
+        f"({decoded / elapsed:.1f} fps), {len(codes)} distinct codes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Reads the loopback MJPEG stand-in (`mjpeg_server.py`) with the Stream capturer and reports the
+frames received and the frame age, while a simulated slow consumer takes only some of them.
+Halfway through, the server drops the connection to show the reconnect.
+
+    uv run python benchmarks/bench_stream.py [CORPUS_DIR] [--fps 30] [--seconds 10]
+"""
+
+import argparse
+import time
+
+from _corpus import load_corpus
+from cv2.typing import MatLike
+from mjpeg_server import MjpegServer
+
+from capture_api import StreamCapturer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--fps", type=float, default=30)
+    _ = parser.add_argument("--seconds", type=float, default=10)
+    _ = parser.add_argument("--decode-ms", type=float, default=50, help="simulated decode time")
+    args = parser.parse_args()
+
+    server = MjpegServer(load_corpus(args.corpus), args.fps)
+    server.start()
+
+    busy_until = 0.0
+    received = 0
+
+    def wants_frame() -> bool:
+        return time.perf_counter() >= busy_until
+
+    def on_frame(_frame: MatLike) -> None:
+        nonlocal busy_until, received
+        received += 1
+        busy_until = time.perf_counter() + args.decode_ms / 1000
+
+    capturer = StreamCapturer()
+    capturer.set_frame_callback(on_frame)
+    capturer.set_demand_callback(wants_frame)
+    capturer.set_option(server.url)
+
+    start = time.perf_counter()
+    capturer.start_capturing()
+    time.sleep(args.seconds / 2)
+    server.disconnect_clients()
+    time.sleep(args.seconds / 2)
+    stopping = time.perf_counter()
+    capturer.stop_capturing()
+    stop_ms = (time.perf_counter() - stopping) * 1000
+    elapsed = time.perf_counter() - start
+    # ends the reader's current read, so it closes the stream
+    server.disconnect_clients()
+    server.shutdown()
+
+    print(
+        f"{server.frames_sent} frames sent, {received} passed on ({received / elapsed:.1f} fps), "
+        f"{capturer.connects} connections, stop_capturing returned in {stop_ms:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compares pyzbar decode time with every symbology enabled against a restricted allow-list.
+
+uv run python benchmarks/bench_symbologies.py [CORPUS_DIR] [--symbologies CODE128 QRCODE]
+"""
+
+import argparse
+
+import cv2
+from _corpus import load_corpus, time_per_frame
+
+from detect_code import SUPPORTED_SYMBOLOGIES, decode_barcodes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--symbologies", nargs="+", default=["CODE128", "QRCODE"])
+    args = parser.parse_args()
+
+    unknown = set(args.symbologies) - set(SUPPORTED_SYMBOLOGIES)
+    if unknown:
+        raise SystemExit(f"Unknown symbologies: {sorted(unknown)}")
+
+    frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in load_corpus(args.corpus)]
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    cases: dict[str, list[str] | None] = {
+        "all": None,
+        ", ".join(args.symbologies): args.symbologies,
+    }
+    baseline = None
+    for name, symbologies in cases.items():
+        hits = sum(len(decode_barcodes(frame, symbologies=symbologies)) for frame in frames)
+        seconds = time_per_frame(frames, lambda f: decode_barcodes(f, symbologies=symbologies))
+        baseline = baseline or seconds
+        print(
+            f"{name:<30} {seconds * 1000:8.2f} ms/frame  {baseline / seconds:5.2f}x  "
+            f"{hits} codes read"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""A stand-in IP camera: serves frames as an MJPEG stream over HTTP on loopback, the way most IP
+cameras do (`multipart/x-mixed-replace`), so the Stream capturer can be exercised without one.
+
+    uv run python benchmarks/mjpeg_server.py [CORPUS_DIR] [--fps 30] [--port 8081]
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+from _corpus import load_corpus
+from cv2.typing import MatLike
+
+BOUNDARY = "frame"
+
+
+class MjpegServer(ThreadingHTTPServer):
+    """Streams `frames` in a loop at `fps` to every client. `url` is the stream's address.
+    `disconnect_clients` drops the open connections, like a camera rebooting."""
+
+    daemon_threads: bool = True
+
+    def __init__(self, frames: list[MatLike], fps: float, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _StreamHandler)
+        self.jpegs: list[bytes] = [cv2.imencode(".jpg", frame)[1].tobytes() for frame in frames]
+        self.fps: float = fps
+        self.generation: int = 0
+        "Bumped by `disconnect_clients`, older connections end."
+        self.frames_sent: int = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/stream.mjpg"
+
+    def start(self) -> None:
+        "Serves on a background thread."
+        threading.Thread(target=self.serve_forever, name="MJPEG Server", daemon=True).start()
+
+    def disconnect_clients(self) -> None:
+        self.generation += 1
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    server: MjpegServer  # pyright: ignore[reportIncompatibleVariableOverride]
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.end_headers()
+
+        generation = self.server.generation
+        start = time.perf_counter()
+        count = 0
+        try:
+            while self.server.generation == generation:
+                jpeg = self.server.jpegs[count % len(self.server.jpegs)]
+                _ = self.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                _ = self.wfile.write(jpeg + b"\r\n")
+                count += 1
+                self.server.frames_sent += 1
+                time.sleep(max(0.0, start + count / self.server.fps - time.perf_counter()))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("corpus", nargs="?", help="directory of frames (default: synthetic)")
+    _ = parser.add_argument("--fps", type=float, default=30)
+    _ = parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    server = MjpegServer(load_corpus(args.corpus), args.fps, args.port)
+    print(f"Streaming at {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
-from .capture_api import CaptureAPI
+from .capture_api import PRIMARY_SOURCE, CaptureAPI
 from .capturer_abc import Capturer
 from .capturers import CAPTURERS
+from .file_capturer import FileCapturer
 
 # from .flask_capturer import FlaskCapturer
 from .local_capturer import LocalCapturer
+from .screen_capturer import ScreenCapturer
+from .session_recorder import SessionReader, SessionRecorder
+from .stream_capturer import StreamCapturer
 
 # __all__ = ["CaptureAPI", "Capturer", "FlaskCapturer", "LocalCapturer", "CAPTURERS"]
-__all__ = ["CaptureAPI", "Capturer", "LocalCapturer", "CAPTURERS"]
+__all__ = [
+    "CaptureAPI",
+    "Capturer",
+    "LocalCapturer",
+    "FileCapturer",
+    "CAPTURERS",
+    "PRIMARY_SOURCE",
+    "ScreenCapturer",
+    "SessionReader",
+    "SessionRecorder",
+    "StreamCapturer",
+]
@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+
+import cv2
+from cv2_enumerate_cameras.camera_info import CameraInfo
+
+from configs import CaptureProfile
+
+from .camera_profiles import apply_profile
+
+__all__ = ["CameraHandlePool", "T_HANDLE_KEY", "open_first"]
+
+logger = logging.getLogger(__name__)
+
+T_HANDLE_KEY = tuple[str, int]
+"Camera name and device index."
+
+PREFERRED_OPEN_GRACE: float = 0.5
+"Seconds `open_first` waits for a preferred backend after a later one opened."
+
+
+class CameraHandlePool:
+    """Keeps the last few opened camera handles open after switching away from them, so
+    switching back doesn't pay for opening and negotiating the device again.
+
+    Handles are keyed by camera name and device index, so a handle whose index now belongs to
+    another device is never handed out again. They are evicted least recently used first.
+    """
+
+    def __init__(self, capacity: int = 2) -> None:
+        self.capacity: int = capacity
+        self._lock: threading.Lock = threading.Lock()
+        self._handles: OrderedDict[T_HANDLE_KEY, cv2.VideoCapture] = OrderedDict()
+        self._closed: bool = False
+        "Set by `close`, handles checked in after it are released right away."
+
+    def checkout(self, key: T_HANDLE_KEY) -> cv2.VideoCapture | None:
+        "Takes the warm handle of `key` out of the pool, if there is a usable one."
+        with self._lock:
+            camera = self._handles.pop(key, None)
+        if camera is not None and not camera.isOpened():
+            camera.release()
+            return None
+        return camera
+
+    def checkin(self, key: T_HANDLE_KEY, camera: cv2.VideoCapture) -> None:
+        "Puts a handle that is no longer read from back, releasing the oldest ones over capacity."
+        evicted: list[cv2.VideoCapture] = []
+        with self._lock:
+            if self._closed:
+                evicted.append(camera)
+            else:
+                if (previous := self._handles.pop(key, None)) is not None:
+                    evicted.append(previous)
+                self._handles[key] = camera
+                while len(self._handles) > self.capacity:
+                    evicted.append(self._handles.popitem(last=False)[1])
+        for handle in evicted:
+            handle.release()
+
+    def discard(self, key: T_HANDLE_KEY) -> None:
+        "Releases the warm handle of `key`, if there is one."
+        with self._lock:
+            camera = self._handles.pop(key, None)
+        if camera is not None:
+            camera.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for camera in handles:
+            camera.release()
+
+    def close(self) -> None:
+        """Releases every handle, and from now on the ones checked in too: a capture thread that
+        is still stopping checks its camera in after this."""
+        with self._lock:
+            self._closed = True
+        self.clear()
+
+
+def _open(camera_info: CameraInfo, profile: CaptureProfile | None) -> cv2.VideoCapture | None:
+    camera = cv2.VideoCapture(camera_info.index)
+    if not camera.isOpened():
+        camera.release()
+        return None
+    if profile:
+        apply_profile(camera, profile)
+    else:
+        # set frame size to a high value.
+        # OpenCV will automatically negotiate with the driver and default to the highest
+        # supported resolution for that device
+        _ = camera.set(cv2.CAP_PROP_FRAME_WIDTH, 10000)
+        _ = camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 10000)
+    return camera
+
+
+def _opened(future: "Future[cv2.VideoCapture | None]") -> cv2.VideoCapture | None:
+    "The handle of a finished open, `None` if the camera didn't open."
+    if future.exception() is not None:
+        return None
+    return future.result()
+
+
+def _release_late(future: "Future[cv2.VideoCapture | None]") -> None:
+    if (camera := _opened(future)) is not None:
+        camera.release()
+
+
+def open_first(
+    cameras: list[CameraInfo], profile: CaptureProfile | None = None
+) -> tuple[cv2.VideoCapture, CameraInfo] | None:
+    """Opens every candidate backend of a camera at once and returns a handle that opens, with
+    the profile applied. Earlier candidates are preferred: once one opens, those before it that
+    are still opening get `PREFERRED_OPEN_GRACE` seconds to catch up. The others are released as
+    they finish opening. Returns `None` if none of them opens."""
+    if not cameras:
+        return None
+
+    executor = ThreadPoolExecutor(len(cameras), thread_name_prefix="Open Camera")
+    futures = [executor.submit(_open, camera, profile) for camera in cameras]
+    result: tuple[cv2.VideoCapture, CameraInfo] | None = None
+    try:
+        for future in as_completed(futures):
+            if _opened(future) is None:
+                continue
+            candidates = futures[: futures.index(future) + 1]
+            _ = wait(candidates[:-1], timeout=PREFERRED_OPEN_GRACE)
+            for candidate, camera_info in zip(candidates, cameras):
+                if candidate.done() and (camera := _opened(candidate)) is not None:
+                    result = (camera, camera_info)
+                    break
+            break
+    finally:
+        executor.shutdown(wait=False)
+
+    for future, camera_info in zip(futures, cameras):
+        if future.done() and future.exception() is not None:
+            logger.warning(f'Opening "{camera_info}" failed: {future.exception()}')
+        if result is None or camera_info is not result[1]:
+            future.add_done_callback(_release_late)
+    return result
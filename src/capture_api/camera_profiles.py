@@ -0,0 +1,164 @@
+import logging
+import time
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from configs import CaptureProfile, CaptureTarget
+
+__all__ = [
+    "CameraMode",
+    "apply_profile",
+    "choose_mode",
+    "current_mode",
+    "extract_luma",
+    "probe_modes",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class CameraMode(NamedTuple):
+    width: int
+    height: int
+    fourcc: str
+    fps: float
+    "Frame rate the driver reports for the mode."
+    measured_fps: float
+    "Frame rate actually delivered while probing."
+
+    def to_profile(self) -> CaptureProfile:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "fourcc": self.fourcc,
+            "buffer_size": 1,
+        }
+
+
+PROBE_RESOLUTIONS: list[tuple[int, int]] = [
+    (640, 480),
+    (1280, 720),
+    (1920, 1080),
+    (2560, 1440),
+    (3840, 2160),
+]
+PROBE_FOURCCS: list[str] = ["MJPG", "YUYV"]
+PROBE_FPS: list[float] = [30, 60]
+
+
+def _fourcc_to_str(value: float) -> str:
+    code = int(value)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
+
+def apply_profile(camera: cv2.VideoCapture, profile: CaptureProfile) -> None:
+    # the pixel format has to be set before the size, some backends reset the size otherwise
+    if "fourcc" in profile:
+        _ = camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter.fourcc(*profile["fourcc"]))
+    if "width" in profile:
+        _ = camera.set(cv2.CAP_PROP_FRAME_WIDTH, profile["width"])
+    if "height" in profile:
+        _ = camera.set(cv2.CAP_PROP_FRAME_HEIGHT, profile["height"])
+    if "fps" in profile:
+        _ = camera.set(cv2.CAP_PROP_FPS, profile["fps"])
+    if "buffer_size" in profile:
+        _ = camera.set(cv2.CAP_PROP_BUFFERSIZE, profile["buffer_size"])
+
+
+def current_mode(camera: cv2.VideoCapture, measured_fps: float = 0.0) -> CameraMode:
+    return CameraMode(
+        int(camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        _fourcc_to_str(camera.get(cv2.CAP_PROP_FOURCC)),
+        camera.get(cv2.CAP_PROP_FPS),
+        measured_fps,
+    )
+
+
+def extract_luma(raw: MatLike, width: int, height: int, fourcc: str) -> MatLike | None:
+    """Returns the luminance plane of a frame read with `CAP_PROP_CONVERT_RGB` off, as a
+    contiguous single channel image. Which layout arrives depends on the backend and pixel format.
+    Unless it's `raw` itself, the result never shares memory with `raw`, so a pooled `raw` can be
+    released right away. Returns `None` for layouts it doesn't know."""
+    if raw.ndim == 2 and raw.shape == (height, width):
+        return raw
+    if raw.ndim == 3 and raw.shape[2] == 3:
+        # the backend converted anyway
+        return cv2.cvtColor(raw, cv2.COLOR_BGR2GRAY)
+
+    packed = raw
+    if raw.ndim == 3 and raw.shape[:2] == (height, width) and raw.shape[2] == 2:
+        packed = raw.reshape(height, width * 2)
+    if fourcc == "MJPG":
+        # the JPEG is decoded straight to gray, the chroma planes are never upsampled
+        return cv2.imdecode(np.asarray(raw).reshape(-1), cv2.IMREAD_GRAYSCALE)
+    if packed.size == width * height * 2:
+        # packed 4:2:2, the luma byte comes first in YUYV and second in UYVY
+        pairs = np.asarray(packed).reshape(height, width, 2)
+        return np.ascontiguousarray(pairs[:, :, 1 if fourcc == "UYVY" else 0])
+    if packed.size == width * height * 3 // 2:
+        # planar 4:2:0 (NV12, I420), the luma plane comes first. Copied, the plane is already
+        # contiguous so a view would keep pointing into the (reused) raw buffer
+        return np.asarray(packed).reshape(-1)[: width * height].reshape(height, width).copy()
+    return None
+
+
+def _measure_fps(camera: cv2.VideoCapture, frames: int) -> float:
+    for _ in range(3):  # let the driver settle after the mode change
+        _ = camera.read()
+    start = time.perf_counter()
+    read = 0
+    for _ in range(frames):
+        ok, _ = camera.read()
+        if ok:
+            read += 1
+    elapsed = time.perf_counter() - start
+    return read / elapsed if elapsed > 0 else 0.0
+
+
+def probe_modes(index: int, backend: int, sample_frames: int = 30) -> list[CameraMode]:
+    """Tries each combination of `PROBE_FOURCCS`, `PROBE_RESOLUTIONS` and `PROBE_FPS` and returns
+    the distinct modes the device actually switched to, with their measured frame rate.
+    Takes a few seconds per mode."""
+    camera = cv2.VideoCapture(index, backend)
+    if not camera.isOpened():
+        logger.warning(f"Could not open camera {index} (backend {backend}) to probe it.")
+        return []
+
+    modes: dict[tuple[int, int, str, float], CameraMode] = {}
+    try:
+        for fourcc in PROBE_FOURCCS:
+            for width, height in PROBE_RESOLUTIONS:
+                for fps in PROBE_FPS:
+                    profile: CaptureProfile = {
+                        "fourcc": fourcc,
+                        "width": width,
+                        "height": height,
+                        "fps": fps,
+                    }
+                    apply_profile(camera, profile)
+                    mode = current_mode(camera)
+                    key = (mode.width, mode.height, mode.fourcc, mode.fps)
+                    if key in modes:
+                        continue
+                    mode = mode._replace(measured_fps=_measure_fps(camera, sample_frames))
+                    logger.info(f"Probed camera {index}: {mode}")
+                    modes[key] = mode
+    finally:
+        camera.release()
+
+    return list(modes.values())
+
+
+def choose_mode(modes: list[CameraMode], target: CaptureTarget) -> CameraMode | None:
+    "Returns the best mode for the target, or `None` if no mode is tall enough."
+    eligible = [mode for mode in modes if mode.height >= target["min_height"]]
+    if not eligible:
+        return None
+    if target["prefer"] == "fps":
+        return max(eligible, key=lambda m: (round(m.measured_fps), m.width * m.height))
+    return max(eligible, key=lambda m: (m.width * m.height, m.measured_fps))
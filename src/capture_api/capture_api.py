@@ -1,41 +1,106 @@
 import logging
 from collections.abc import Callable, Sequence
+from functools import partial
+from pathlib import Path
 
 from cv2.typing import MatLike
 
-from .capturer_abc import Capturer
+from configs import RECORD_MAX_FRAMES, RECORD_QUEUE_SIZE, RECORD_SIZE_MB, configs
+
+from .capturer_abc import PRIMARY_SOURCE, Capturer
 from .capturers import CAPTURERS
+from .session_recorder import SessionRecorder
 
 T_METHOD = type[Capturer]
+T_FRAME_CALLBACK = Callable[[MatLike, str], None]
+"Called with each frame and the name of the source it came from."
 
 logger = logging.getLogger(__name__)
 
 
 # TODO: refactor capturer handling
 class CaptureAPI:
+    """Runs the capturer selected with `set_option`, plus any number of extra capturers that
+    capture at the same time (e.g. several cameras around a packing station). Each capturer
+    reads on its own thread. Frames are tagged with their source: `PRIMARY_SOURCE` for the
+    selected capturer, the option name for the extra ones."""
+
     def __init__(self) -> None:
-        self._frame_callback: Callable[[MatLike], None] | None = None
+        self._frame_callback: T_FRAME_CALLBACK | None = None
+        self._demand_callback: Callable[[str], bool] | None = None
         self._capturer: Capturer | None = None
+        self._option: str | None = None
+        self._extra_capturers: dict[str, Capturer] = {}
+        self._options_changed_callback: Callable[[list[str]], None] | None = None
         self._lock_capture: bool = False
         self._option_maps: dict[str, tuple[T_METHOD, str]] = {}
         self._capturing: bool = False
+        self._recorder: SessionRecorder | None = None
 
-    def set_frame_callback(self, func: Callable[[MatLike], None] | None) -> None:
+    def set_frame_callback(self, func: T_FRAME_CALLBACK | None) -> None:
         self._frame_callback = func
 
+    def set_demand_callback(self, func: Callable[[str], bool] | None) -> None:
+        "Sets a callback that tells whether the consumer will use a frame of a source right now."
+        self._demand_callback = func
+        if self._capturer is not None:
+            self._capturer.set_demand_callback(self._source_demand(PRIMARY_SOURCE))
+        for source, capturer in self._extra_capturers.items():
+            capturer.set_demand_callback(self._source_demand(source))
+
+    def set_options_changed_callback(self, func: Callable[[list[str]], None] | None) -> None:
+        """Sets a callback called with the new `get_options` whenever a capturing method's
+        options change, e.g. when a camera is plugged in. May be called from any thread."""
+        self._options_changed_callback = func
+        for method in self.get_available_capturing_methods():
+            method.set_options_changed_callback(self._on_options_changed)
+
+    def watch_options(self, interval: float) -> None:
+        "Re-checks the capturing methods' options every `interval` seconds."
+        for method in self.get_available_capturing_methods():
+            method.watch_options(interval)
+
     def start_capturing(self) -> None:
         logger.info(f"Starting capture")
-        if self._capturer is None:
-            logger.error("Capturer not selected")
-            raise Exception("Capturer not selected")
-        self._capturer.start_capturing()
         self._capturing = True
+        if self._capturer is None:
+            # e.g. no camera was cached, capturing starts once an option is selected
+            logger.warning("Capturer not selected yet")
+        else:
+            self._capturer.start_capturing()
+        for capturer in self._extra_capturers.values():
+            capturer.start_capturing()
 
     def stop_capturing(self) -> None:
         logger.info("Stopping capture")
         if self._capturer is not None:
             self._capturer.stop_capturing()
             self._capturing = False
+        for capturer in self._extra_capturers.values():
+            capturer.stop_capturing()
+
+    def close(self) -> None:
+        "Stops capturing and releases what the capturing methods keep open."
+        self.stop_capturing()
+        self.stop_recording()
+        for method in self.get_available_capturing_methods():
+            method.release_shared_resources()
+
+    def start_recording(self, path: Path) -> None:
+        """Records every frame handed on from here, of every source, to the session file `path`.
+        Replay it with the File capturer."""
+        self.stop_recording()
+        self._recorder = SessionRecorder(
+            path,
+            max_frames=configs[RECORD_MAX_FRAMES],
+            data_size=configs[RECORD_SIZE_MB] * 2**20,
+            queue_size=configs[RECORD_QUEUE_SIZE],
+        )
+
+    def stop_recording(self) -> None:
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
 
     @staticmethod
     def get_available_capturing_methods() -> Sequence[T_METHOD]:
@@ -43,26 +108,35 @@ class CaptureAPI:
         return CAPTURERS
 
     def get_options(self) -> list[str]:
+        # built aside and swapped in whole, the options can be refreshed from a background thread
+        # while `set_option` reads them on the UI thread
+        option_maps: dict[str, tuple[T_METHOD, str]] = {}
         options: list[str] = []
         for method in self.get_available_capturing_methods():
             name = method.name if method.name is not None else method.__name__
             available_options = method.available_options()
             if available_options:
-                for opt in method.available_options():
+                for opt in available_options:
                     option = f"{name}: {opt}"
-                    self._option_maps[option] = (method, opt)
+                    option_maps[option] = (method, opt)
                     options.append(option)
-            else:
+            elif not method.requires_option:
                 option = f"{name}"
-                self._option_maps[option] = (method, "")
+                option_maps[option] = (method, "")
                 options.append(option)
+        self._option_maps = option_maps
         return options
 
     def set_option(self, option: str) -> None:
-        if option not in self._option_maps:
+        option_maps = self._option_maps
+        if option not in option_maps:
             raise Exception(f'Unexpectedly the option: "{option}" not found.')
 
-        method, opt = self._option_maps[option]
+        if option in self._extra_capturers:
+            logger.warning(f'"{option}" is now the selected capture, stopping its extra capturer')
+            self._extra_capturers.pop(option).stop_capturing()
+
+        method, opt = option_maps[option]
         if self._capturer is None:
             self._capturer = method()
             if self._capturing:
@@ -75,14 +149,65 @@ class CaptureAPI:
             if self._capturing:
                 self._capturer.start_capturing()
 
-        self._capturer.set_frame_callback(self._handle_frame)
+        self._capturer.set_frame_callback(partial(self._handle_frame, PRIMARY_SOURCE))
+        self._capturer.set_demand_callback(self._source_demand(PRIMARY_SOURCE))
 
         # check and change capture option
         if opt in self._capturer.available_options():
             self._capturer.set_option(opt)
         else:
             raise Exception(f'Option: "{opt}" not found in "{method.name}"')
+        self._option = option
+
+    def set_extra_options(self, options: list[str]) -> None:
+        """Captures from each of `options` at the same time as the selected option, each with
+        its own capturer. Extra capturers not in `options` any more are stopped."""
+        option_maps = self._option_maps
+        for option in list(self._extra_capturers):
+            if option not in options:
+                logger.info(f'Stopping extra capture "{option}"')
+                self._extra_capturers.pop(option).stop_capturing()
+
+        for option in options:
+            if option in self._extra_capturers:
+                continue
+            if option == self._option:
+                logger.warning(f'"{option}" is already the selected capture, not adding it twice')
+                continue
+            if option not in option_maps:
+                raise Exception(f'Unexpectedly the option: "{option}" not found.')
+
+            method, opt = option_maps[option]
+            capturer = method()
+            capturer.set_frame_callback(partial(self._handle_frame, option))
+            capturer.set_demand_callback(self._source_demand(option))
+            capturer.set_option(opt)
+            logger.info(f'Adding extra capture "{option}"')
+            self._extra_capturers[option] = capturer
+            if self._capturing:
+                capturer.start_capturing()
 
-    def _handle_frame(self, frame: MatLike) -> None:
+    def report_activity(self, source: str) -> None:
+        "Tells the capturer of `source` that a code was decoded from its frames."
+        if source == PRIMARY_SOURCE:
+            capturer = self._capturer
+        else:
+            capturer = self._extra_capturers.get(source)
+        if capturer is not None:
+            capturer.report_activity()
+
+    def _on_options_changed(self) -> None:
+        func = self._options_changed_callback
+        if func is not None:
+            func(self.get_options())
+
+    def _source_demand(self, source: str) -> Callable[[], bool] | None:
+        if self._demand_callback is None:
+            return None
+        return partial(self._demand_callback, source)
+
+    def _handle_frame(self, source: str, frame: MatLike) -> None:
+        if (recorder := self._recorder) is not None:
+            recorder.record(frame, source)
         if self._frame_callback is not None:
-            self._frame_callback(frame)
+            self._frame_callback(frame, source)
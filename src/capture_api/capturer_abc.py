@@ -3,11 +3,16 @@ from collections.abc import Callable
 
 from cv2.typing import MatLike
 
+PRIMARY_SOURCE: str = ""
+"Source name of the capturer selected with `CaptureAPI.set_option`."
+
 
 class Capturer(ABC):
-    # TODO: implement to emit signals on available options change
     name: str | None = None
     "Name of the capturer method."
+    requires_option: bool = False
+    "Whether the method is only offered when it has options, e.g. files to replay."
+    _options_changed_callback: Callable[[], None] | None = None
 
     @abstractmethod
     def start_capturing(self) -> None: ...
@@ -18,9 +23,41 @@ class Capturer(ABC):
     @abstractmethod
     def set_frame_callback(self, func: Callable[[MatLike], None]) -> None: ...
 
+    def set_demand_callback(self, func: Callable[[], bool] | None) -> None:
+        """Sets a callback that tells whether the consumer will use a frame right now.
+        Capturers that can skip decoding frames nobody wants may use it, others ignore it."""
+        pass
+
     @staticmethod
     @abstractmethod
     def available_options() -> list[str]: ...
 
     @abstractmethod
     def set_option(self, option: str) -> None: ...
+
+    def report_activity(self) -> None:
+        """Tells the capturer a code was decoded from its frames. Capturers that slow down on
+        static scenes use it to stay at full rate, others ignore it."""
+        pass
+
+    @classmethod
+    def set_options_changed_callback(cls, func: Callable[[], None] | None) -> None:
+        "Sets a callback called, from any thread, when `available_options` changes."
+        cls._options_changed_callback = func
+
+    @classmethod
+    def watch_options(cls, interval: float) -> None:
+        """Re-checks the available options every `interval` seconds, for capturers whose
+        options can change while running (e.g. hot-plugged cameras). Others ignore it."""
+        pass
+
+    @classmethod
+    def release_shared_resources(cls) -> None:
+        "Releases what the capturers of this method share, e.g. when the app quits."
+        pass
+
+    @classmethod
+    def _notify_options_changed(cls) -> None:
+        func = cls._options_changed_callback
+        if func is not None:
+            func()
@@ -1,5 +1,8 @@
 # from .flask_capturer import FlaskCapturer
+from .file_capturer import FileCapturer
 from .local_capturer import LocalCapturer
+from .screen_capturer import ScreenCapturer
+from .stream_capturer import StreamCapturer
 
 # CAPTURERS = (LocalCapturer, FlaskCapturer)
-CAPTURERS = (LocalCapturer,)
+CAPTURERS = (LocalCapturer, StreamCapturer, ScreenCapturer, FileCapturer)
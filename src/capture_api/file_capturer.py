@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Literal, override
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from configs import REPLAY_FPS, REPLAY_LOOP, REPLAY_SOURCES, configs
+from frame_pool import FramePool, release
+
+from .capturer_abc import PRIMARY_SOURCE, Capturer
+from .session_recorder import SESSION_SUFFIX, SessionReader
+
+__all__ = ["FileCapturer", "open_replay"]
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+
+T_PACING = Literal["fast", "realtime"]
+PACINGS: tuple[T_PACING, ...] = ("fast", "realtime")
+
+
+T_REPLAY = Iterator[tuple[float, MatLike]]
+"Frames, each with the seconds since the first frame at which it's due."
+
+
+def open_replay(path: Path) -> tuple[float, T_REPLAY]:
+    """Returns the frame rate and the frames of a recorded session, a video file, or the images
+    in a directory (sorted by name). Sessions keep their recorded timing, images are replayed at
+    `replay_fps`, as are videos that don't report a frame rate."""
+    if path.is_dir():
+        images = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        return configs[REPLAY_FPS], _read_images(images, configs[REPLAY_FPS])
+
+    if path.suffix == SESSION_SUFFIX:
+        reader = SessionReader(path)
+        return _session_fps(reader), _read_session(reader)
+
+    video = cv2.VideoCapture(path.as_posix())
+    if not video.isOpened():
+        raise Exception(f'Could not open "{path}" for replay')
+    fps = video.get(cv2.CAP_PROP_FPS)
+    fps = fps if fps > 0 else configs[REPLAY_FPS]
+    return fps, _read_video(video, fps)
+
+
+def _read_images(images: list[Path], fps: float) -> T_REPLAY:
+    for i, image in enumerate(images):
+        frame = cv2.imread(image.as_posix())
+        if frame is None:
+            logger.warning(f'Skipping unreadable image "{image}"')
+            continue
+        yield i / fps, frame
+
+
+def _read_video(video: cv2.VideoCapture, fps: float) -> T_REPLAY:
+    try:
+        count = 0
+        while True:
+            is_reading, frame = video.read()
+            if not is_reading:
+                return
+            yield count / fps, frame
+            count += 1
+    finally:
+        video.release()
+
+
+def _session_fps(reader: SessionReader) -> float:
+    if len(reader) < 2:
+        return configs[REPLAY_FPS]
+    duration = reader.frame(len(reader) - 1)[0] - reader.frame(0)[0]
+    return (len(reader) - 1) / duration if duration > 0 else configs[REPLAY_FPS]
+
+
+def _read_session(reader: SessionReader) -> T_REPLAY:
+    "Frames of the selected capture option, or of the first recorded source, zero-copy."
+    if not reader.sources:
+        return
+    source = PRIMARY_SOURCE if PRIMARY_SOURCE in reader.sources else reader.sources[0]
+    if len(reader.sources) > 1:
+        logger.info(f'Replaying source "{source}" of {len(reader.sources)} recorded')
+    start: float | None = None
+    for timestamp, frame in reader.frames(source):
+        if start is None:
+            start = timestamp
+        yield timestamp - start, frame
+    reader.close()
+
+
+class FileCapturer(Capturer):
+    """Replays a recorded session, a video file or a directory of images as if it were a camera,
+    to measure and tune the pipeline on recorded footage without a camera.
+
+    Options are the `replay_sources` paths, each with two pacings: "realtime" delivers frames
+    with the recording's timing, "fast" delivers the next frame as soon as the consumers released
+    the previous one, so every frame is decoded, one after the other, as fast as possible.
+    """
+
+    name: str | None = "File"
+    requires_option: bool = True
+
+    def __init__(self) -> None:
+        self._path: Path | None = None
+        self._pacing: T_PACING = "realtime"
+        self._callback: Callable[[MatLike], None] | None = None
+        self._generation: int = 0
+        self._thread: threading.Thread | None = None
+        self._running: bool = False
+        self.finished: threading.Event = threading.Event()
+        "Set when a replay reaches the end (and `replay_loop` is off) or fails."
+
+    @override
+    def start_capturing(self) -> None:
+        self._running = True
+        self._generation += 1
+        self.finished.clear()
+        self._thread = threading.Thread(
+            target=self._replay, args=(self._generation,), name="File Capture", daemon=True
+        )
+        self._thread.start()
+
+    @override
+    def stop_capturing(self) -> None:
+        self._running = False
+        self._generation += 1
+
+    @override
+    def set_frame_callback(self, func: Callable[[MatLike], None]) -> None:
+        self._callback = func
+
+    @staticmethod
+    @override
+    def available_options() -> list[str]:
+        return [f"{source} ({pacing})" for source in configs[REPLAY_SOURCES] for pacing in PACINGS]
+
+    @override
+    def set_option(self, option: str) -> None:
+        "`option` is a path followed by its pacing in parentheses, e.g. `shift.mp4 (fast)`."
+        path, _, pacing = option.rpartition(" (")
+        pacing = pacing.rstrip(")")
+        if pacing not in PACINGS:
+            raise Exception(f'Unknown replay pacing: "{pacing}"')
+        if not Path(path).exists():
+            raise Exception(f'Replay source not found: "{path}"')
+
+        self._path = Path(path)
+        self._pacing = "fast" if pacing == "fast" else "realtime"
+        if self._running:
+            self.stop_capturing()
+            self.start_capturing()
+
+    def _replay(self, generation: int) -> None:
+        path = self._path
+        if path is None:
+            return
+        try:
+            ended = self._replay_path(generation, path)
+        except Exception:
+            logger.exception(f'Replaying "{path}" failed')
+            ended = True
+        if ended and self._generation == generation:
+            self.finished.set()
+
+    def _replay_path(self, generation: int, path: Path) -> bool:
+        "Replays until the end (or until stopped with `replay_loop`). False if it was stopped."
+        # fast pacing sends each frame in the pool's only buffer
+        pool = FramePool(1) if self._pacing == "fast" else None
+        while self._generation == generation:
+            fps, frames = open_replay(path)
+            logger.info(f'Replaying "{path}" ({self._pacing}, {fps:g} fps)')
+            start = time.perf_counter()
+            count = 0
+            for due, frame in frames:
+                if pool is None:
+                    if not self._wait_until(generation, start + due):
+                        return False
+                elif (frame := self._wait_for_consumers(generation, pool, frame)) is None:
+                    return False
+                if self._callback is not None:
+                    self._callback(frame)
+                # consumers that keep the frame have retained it in the callback
+                release(frame)
+                count += 1
+
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f'Replayed {count} frames of "{path}" in {elapsed:.2f}s '
+                f"({count / elapsed if elapsed > 0 else 0:.1f} fps)"
+            )
+            if not configs[REPLAY_LOOP]:
+                return True
+        return False
+
+    def _wait_until(self, generation: int, due: float) -> bool:
+        "Waits until the next frame is due. False if the replay was stopped."
+        if (delay := due - time.perf_counter()) > 0:
+            time.sleep(delay)
+        return self._generation == generation
+
+    def _wait_for_consumers(
+        self, generation: int, pool: FramePool, frame: MatLike
+    ) -> MatLike | None:
+        """Waits until every consumer released the previous frame, then returns a copy of `frame`
+        in the freed buffer. With one frame on its way at a time, the decode engine can't drop
+        one, whichever mailbox it uses. `None` if the replay was stopped."""
+        while self._generation == generation:
+            if (buffer := pool.acquire(frame.shape, frame.dtype)) is not None:
+                np.copyto(buffer, frame)
+                return buffer
+            time.sleep(0.001)
+        return None
@@ -1,57 +1,153 @@
+import json
 import logging
 import threading
+import time
+import weakref
 from collections import defaultdict
 from collections.abc import Callable
 from typing import override
 
 import cv2
+import numpy as np
 from cv2.typing import MatLike
 from cv2_enumerate_cameras import enumerate_cameras
 from cv2_enumerate_cameras.camera_info import CameraInfo
 
+from configs import (
+    ACTIVE_FPS,
+    ADAPTIVE_RATE,
+    CAPTURE_PROFILES,
+    CHANGE_THRESHOLD,
+    FRAME_POOL_SIZE,
+    GRAB_ON_DEMAND,
+    GRAYSCALE_CAPTURE,
+    IDLE_AFTER,
+    IDLE_FPS,
+    WARM_CAMERAS,
+    CaptureProfile,
+    CaptureTarget,
+    configs,
+)
+from file_system import CAMERAS_CACHE_FILE
+from frame_pool import FramePool, release
+
+from .camera_pool import CameraHandlePool, open_first
+from .camera_profiles import (
+    choose_mode,
+    current_mode,
+    extract_luma,
+    probe_modes,
+)
 from .capturer_abc import Capturer
+from .rate_controller import AdaptiveRateController
 
 logger = logging.getLogger(__name__)
 
+STATS_LOG_INTERVAL: float = 5.0
+"Seconds between the grabbed/retrieved log lines."
+
 
 class LocalCapturer(Capturer):
+    """Captures from a local camera. The cameras are listed from the last enumeration cached
+    in `CAMERAS_CACHE_FILE` and enumerated again in the background, since probing every
+    backend can take seconds.
+
+    Starting, stopping and switching cameras never wait on the device: the capture thread opens
+    and closes cameras itself. Cameras switched away from are kept open in a `CameraHandlePool`
+    for a quick switch back.
+    """
+
     _option_to_cameras_map: dict[str, tuple[CameraInfo, ...]] | None = None
+    _refresh_lock: threading.Lock = threading.Lock()
+    _refresh_thread: threading.Thread | None = None
+    _watch_thread: threading.Thread | None = None
+    _instances: "weakref.WeakSet[LocalCapturer]" = weakref.WeakSet()
+    _handle_pool: CameraHandlePool | None = None
     name: str | None = "Local Camera"
+    requires_option: bool = True
 
     def __init__(self) -> None:
+        LocalCapturer._instances.add(self)
+        self._option_lock: threading.Lock = threading.Lock()
         self._selected_cameras: list[CameraInfo] = []
         self._selected_option: str | None = None
+        self._switches: int = 0
+        "Bumped by `set_option`, the capture thread reopens the camera when it changes."
         self._callback: Callable[[MatLike], None] | None = None
-        self._run_capturing: bool = False
+        self._demand_callback: Callable[[], bool] | None = None
+        self._generation: int = 0
+        "Bumped by `start_capturing` and `stop_capturing`, older capture threads end."
+        self._wake: threading.Event = threading.Event()
+        "Wakes a capture thread waiting for a usable option."
         self._thread: threading.Thread | None = None
+        self._rate: AdaptiveRateController | None = None
+        self.grabbed: int = 0
+        "Frames grabbed from the driver since the last stats log."
+        self.retrieved: int = 0
+        "Frames of those that were also retrieved (decoded into an image)."
 
     @override
     def start_capturing(self) -> None:
-        self._run_capturing = True
-        self._thread = threading.Thread(target=self._read_camera)
+        self._generation += 1
+        self._thread = threading.Thread(
+            target=self._capture, args=(self._generation, self._thread), name="Local Capture"
+        )
         self._thread.start()
 
     @override
     def stop_capturing(self) -> None:
-        self._run_capturing = False
-        if self._thread is not None:
-            self._thread.join()
-        self._thread = None
+        "Returns right away. The capture thread closes the camera, or keeps it warm, on its own."
+        self._generation += 1
+        self._wake.set()
 
     @override
     def set_frame_callback(self, func: Callable[[MatLike], None]) -> None:
         self._callback = func
 
+    @override
+    def set_demand_callback(self, func: Callable[[], bool] | None) -> None:
+        self._demand_callback = func
+
     @staticmethod
     @override
     def available_options() -> list[str]:
         if LocalCapturer._option_to_cameras_map is None:
-            LocalCapturer._update_available_options()
+            LocalCapturer._option_to_cameras_map = _load_cached_cameras()
+            LocalCapturer.refresh_options()
 
-        if LocalCapturer._option_to_cameras_map is not None:
-            return list(LocalCapturer._option_to_cameras_map.keys())
-        else:
-            return []
+        return list(LocalCapturer._option_to_cameras_map.keys())
+
+    @staticmethod
+    def refresh_options() -> None:
+        "Enumerates the cameras again on a background thread, unless that is already running."
+        with LocalCapturer._refresh_lock:
+            if LocalCapturer._refresh_thread is not None:
+                return
+            LocalCapturer._refresh_thread = threading.Thread(
+                target=LocalCapturer._refresh, name="Camera Enumeration", daemon=True
+            )
+            LocalCapturer._refresh_thread.start()
+
+    @classmethod
+    @override
+    def watch_options(cls, interval: float) -> None:
+        if LocalCapturer._watch_thread is not None:
+            return
+
+        def watch() -> None:
+            while True:
+                time.sleep(interval)
+                LocalCapturer.refresh_options()
+
+        LocalCapturer._watch_thread = threading.Thread(
+            target=watch, name="Camera Watch", daemon=True
+        )
+        LocalCapturer._watch_thread.start()
+
+    @override
+    def report_activity(self) -> None:
+        if (rate := self._rate) is not None:
+            rate.report_activity()
 
     @override
     def set_option(self, option: str) -> None:
@@ -62,56 +158,254 @@ class LocalCapturer(Capturer):
             print("error. unknown option")
             return
 
-        self._selected_option = option
-        self._selected_cameras = sorted(
-            LocalCapturer._option_to_cameras_map[option],
-            key=lambda x: 0 if x.backend == cv2.CAP_MSMF else 1,
-        )
-        # restart capturing to change the camera port
-        if self._run_capturing:
-            self.stop_capturing()
-            self.start_capturing()
+        with self._option_lock:
+            self._selected_option = option
+            # in order of preference, `open_first` favours the earlier backends
+            self._selected_cameras = sorted(
+                LocalCapturer._option_to_cameras_map[option],
+                key=lambda x: 0 if x.backend == cv2.CAP_MSMF else 1,
+            )
+            # the capture thread changes the camera port, nothing here waits on the device
+            self._switches += 1
+        self._wake.set()
+
+    @classmethod
+    @override
+    def release_shared_resources(cls) -> None:
+        """Closes the cameras kept open for switching back, and the ones capture threads that are
+        still stopping put back later."""
+        LocalCapturer._handles().close()
+
+    @staticmethod
+    def _handles() -> CameraHandlePool:
+        if LocalCapturer._handle_pool is None:
+            LocalCapturer._handle_pool = CameraHandlePool(configs[WARM_CAMERAS])
+        return LocalCapturer._handle_pool
+
+    def _capture(self, generation: int, previous: threading.Thread | None) -> None:
+        # let the previous capture thread put its camera away first, a device may allow only
+        # one user at a time
+        if previous is not None:
+            previous.join()
 
-    def _read_camera(self) -> None:
-        if not len(self._selected_cameras) > 0:
+        while self._generation == generation:
+            self._wake.clear()
+            with self._option_lock:
+                switch = self._switches
+                option = self._selected_option
+                cameras = list(self._selected_cameras)
+            if option is None or not self._read_camera(generation, switch, option, cameras):
+                # wait for another option, or to be stopped
+                _ = self._wake.wait()
+
+    def _read_camera(
+        self, generation: int, switch: int, option: str, cameras: list[CameraInfo]
+    ) -> bool:
+        "Reads `option` until it is switched or capturing stops. False if no camera opened."
+        if not len(cameras) > 0:
             logger.warning(f"Aborting reading camera. because there are no cameras selected.")
-            return
+            return False
 
-        selected_index = 0
-        while True:
-            try:
-                if not len(self._selected_cameras) >= selected_index - 1:
-                    logger.warning(
-                        f'Aborting reading camera. None of the cameras: "{self._selected_cameras}" worked.'
-                    )
-                    return
-                camera = cv2.VideoCapture(self._selected_cameras[selected_index].index)
-                # set frame size to a high value.
-                # OpenCV will automatically negotiate with the driver and default to the highest
-                # supported resolution for that device
-                _ = camera.set(cv2.CAP_PROP_FRAME_WIDTH, 10000)
-                _ = camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 10000)
+        camera: cv2.VideoCapture | None = None
+        camera_info = cameras[0]
+        for candidate in cameras:
+            if (camera := LocalCapturer._handles().checkout((option, candidate.index))) is not None:
+                camera_info = candidate
+                logger.info(f'Switched back to the open camera "{camera_info}"')
                 break
-            except:  # TODO: specify exceptions
-                selected_index += 1
+        if camera is None:
+            opened = open_first(cameras, configs[CAPTURE_PROFILES].get(option))
+            if opened is None:
+                logger.warning(f'Aborting reading camera. None of the cameras: "{cameras}" worked.')
+                return False
+            camera, camera_info = opened
+            logger.info(f'Starting capturing. Selected cam: "{camera_info}"')
+
+        mode = current_mode(camera)
+        logger.info(f"Negotiated capture mode: {mode}")
+        grab_on_demand = configs[GRAB_ON_DEMAND]
+        rate = self._rate = (
+            AdaptiveRateController(
+                configs[IDLE_FPS],
+                configs[ACTIVE_FPS],
+                configs[IDLE_AFTER],
+                configs[CHANGE_THRESHOLD],
+                option,
+            )
+            if configs[ADAPTIVE_RATE]
+            else None
+        )
+        grayscale = configs[GRAYSCALE_CAPTURE]
+        if grayscale:
+            # keep the driver's native YUV output, only its luminance plane is used
+            _ = camera.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        pool = FramePool(configs[FRAME_POOL_SIZE]) if configs[FRAME_POOL_SIZE] > 0 else None
+        # shape and dtype of the last frame read, to size the pooled buffers
+        layout: tuple[tuple[int, ...], np.dtype[np.generic]] | None = None
+        last_stats_log = time.perf_counter()
+        while self._generation == generation and self._switches == switch:
+            # logged first, the rest of the loop skips ahead with `continue`
+            now = time.perf_counter()
+            if now - last_stats_log >= STATS_LOG_INTERVAL:
+                logger.debug(f"Camera: {self.grabbed} frames grabbed, {self.retrieved} retrieved")
+                if pool is not None:
+                    logger.debug(
+                        f"Frame pool: {pool.reused} frames read into reused buffers, "
+                        f"{pool.misses} allocated because every buffer was in use"
+                    )
+                    pool.reused = 0
+                    pool.misses = 0
+                self.grabbed = 0
+                self.retrieved = 0
+                last_stats_log = now
+
+            if grab_on_demand:
+                # grab every frame so the driver queue stays fresh, but only pay for
+                # retrieving (decoding and converting) the frames that will be used
+                if not camera.grab():
+                    continue
+                self.grabbed += 1
+                demand = self._demand_callback
+                if demand is not None and not demand():
+                    continue
+
+            if rate is not None and not rate.due():
+                # between idle frames only keep the driver queue fresh
+                if not grab_on_demand and camera.grab():
+                    self.grabbed += 1
+                continue
+
+            buffer = pool.acquire(*layout) if pool is not None and layout is not None else None
+            if grab_on_demand:
+                is_reading, img = camera.retrieve(buffer)
+            else:
+                is_reading, img = camera.read(buffer)
+                self.grabbed += 1
+            if buffer is not None and img is not buffer:
+                # OpenCV allocated a new array, the frame size changed
+                release(buffer)
+            if is_reading:
+                layout = (img.shape, img.dtype)
 
-        logger.info(f'Starting capturing. Selected cam: "{self._selected_cameras[selected_index]}"')
-        while self._run_capturing:
-            is_reading, img = camera.read()
+            if is_reading and grayscale:
+                luma = extract_luma(img, mode.width, mode.height, mode.fourcc)
+                if luma is not img:
+                    release(img)
+                if luma is None:
+                    logger.warning(
+                        f"Unknown raw frame layout {img.shape} for {mode}. "
+                        + "Falling back to color capture."
+                    )
+                    grayscale = False
+                    _ = camera.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+                    continue
+                img = luma
             if is_reading:  # TODO: implement falling back to other cameras if not is_reading.
+                self.retrieved += 1
+                if rate is not None:
+                    rate.frame_retrieved(img)
                 if self._callback is not None:
                     self._callback(img)
+                # consumers that keep the frame have retained it in the callback
+                release(img)
+            elif buffer is not None and img is buffer:
+                release(buffer)
 
-        camera.release()
+        current_cameras = (LocalCapturer._option_to_cameras_map or {}).get(option, ())
+        if any(c.index == camera_info.index for c in current_cameras):
+            LocalCapturer._handles().checkin((option, camera_info.index), camera)
+        else:
+            # the device index went stale, don't keep the device busy
+            camera.release()
+        return True
 
     @staticmethod
-    def _update_available_options() -> None:
-        LocalCapturer._option_to_cameras_map = {}
+    def probe_profiles(target: CaptureTarget) -> dict[str, CaptureProfile]:
+        """Probes every available camera and returns the profile of the mode that best fits
+        `target` for each, keyed by option. Cameras without a fitting mode are left out.
+        Slow, and the cameras must not be in use."""
+        if LocalCapturer._option_to_cameras_map is None:
+            LocalCapturer._update_available_options()
+
+        profiles: dict[str, CaptureProfile] = {}
+        for option, cameras in (LocalCapturer._option_to_cameras_map or {}).items():
+            camera = cameras[0]
+            mode = choose_mode(probe_modes(camera.index, camera.backend), target)
+            if mode is None:
+                logger.warning(f'No mode of "{option}" fits the capture target {target}')
+                continue
+            logger.info(f'Chose {mode} for "{option}"')
+            profiles[option] = mode.to_profile()
+        return profiles
 
+    @staticmethod
+    def _refresh() -> None:
+        try:
+            LocalCapturer._update_available_options()
+        except Exception:
+            logger.exception("Enumerating the cameras failed")
+        finally:
+            with LocalCapturer._refresh_lock:
+                LocalCapturer._refresh_thread = None
+
+    @staticmethod
+    def _update_available_options() -> None:
         _map: dict[str, list[CameraInfo]] = defaultdict(list)
         for camera in enumerate_cameras():
             option = camera.name
             _map[option].append(camera)
 
-        for option, cameras in _map.items():
-            LocalCapturer._option_to_cameras_map[option] = tuple(cameras)
+        old_map = LocalCapturer._option_to_cameras_map or {}
+        new_map = {option: tuple(cameras) for option, cameras in _map.items()}
+        LocalCapturer._option_to_cameras_map = new_map
+        if _camera_keys(old_map) == _camera_keys(new_map):
+            return
+
+        logger.info(f"Cameras changed: {list(new_map)}")
+        _save_cached_cameras(new_map)
+        for capturer in list(LocalCapturer._instances):
+            option = capturer._selected_option
+            if option is None or option not in new_map:
+                continue
+            if _camera_keys({option: old_map.get(option, ())}) != _camera_keys(
+                {option: new_map[option]}
+            ):
+                # the cached camera index is stale, reopen the camera
+                capturer.set_option(option)
+        LocalCapturer._notify_options_changed()
+
+
+def _camera_keys(
+    cameras_map: dict[str, tuple[CameraInfo, ...]],
+) -> dict[str, list[tuple[int, int, str | None]]]:
+    "What identifies the cameras of each option, `CameraInfo` has no equality."
+    return {
+        option: [(camera.index, camera.backend, camera.path) for camera in cameras]
+        for option, cameras in cameras_map.items()
+    }
+
+
+def _load_cached_cameras() -> dict[str, tuple[CameraInfo, ...]]:
+    if not CAMERAS_CACHE_FILE.exists():
+        return {}
+    try:
+        cached: dict[str, list[dict[str, object]]] = json.loads(
+            CAMERAS_CACHE_FILE.read_text("utf-8")
+        )
+        return {
+            option: tuple(CameraInfo(**camera) for camera in cameras)
+            for option, cameras in cached.items()
+        }
+    except (ValueError, TypeError, AttributeError):
+        logger.warning(f'Ignoring the unreadable camera cache "{CAMERAS_CACHE_FILE}"')
+        return {}
+
+
+def _save_cached_cameras(cameras_map: dict[str, tuple[CameraInfo, ...]]) -> None:
+    cached = {
+        option: [
+            {slot: getattr(camera, slot) for slot in CameraInfo.__slots__} for camera in cameras
+        ]
+        for option, cameras in cameras_map.items()
+    }
+    _ = CAMERAS_CACHE_FILE.write_text(json.dumps(cached, indent=4), "utf-8")
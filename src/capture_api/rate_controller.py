@@ -0,0 +1,80 @@
+import logging
+import time
+
+import cv2
+from cv2.typing import MatLike
+
+__all__ = ["AdaptiveRateController"]
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateController:
+    """Decides which grabbed frames a capturer retrieves. While the scene is static the rate
+    drops to `idle_fps`; the first retrieved frame that shows motion, or a decoded code reported
+    with `report_activity`, brings it straight back to `active_fps`.
+
+    The camera keeps streaming at its own rate and frames are still grabbed, so the first frame
+    after waking up is a fresh one.
+    """
+
+    THUMBNAIL_SIZE: tuple[int, int] = (32, 24)
+
+    def __init__(
+        self,
+        idle_fps: float = 5.0,
+        active_fps: float = 0.0,
+        idle_after: float = 2.0,
+        motion_threshold: float = 4.0,
+        name: str = "",
+    ) -> None:
+        self.idle_fps: float = idle_fps
+        self.active_fps: float = active_fps
+        "0 retrieves at the camera's rate."
+        self.idle_after: float = idle_after
+        "Seconds without motion or decodes before dropping to `idle_fps`."
+        self.motion_threshold: float = motion_threshold
+        "Mean absolute difference (0-255 gray levels) between frames that counts as motion."
+        self.name: str = name
+        "Shown in the transition logs."
+        self.active: bool = True
+
+        self._last_activity: float = time.monotonic()
+        self._last_retrieve: float = 0.0
+        self._thumbnail: MatLike | None = None
+
+    def due(self) -> bool:
+        "Whether the next frame should be retrieved."
+        fps = self.active_fps if self.active else self.idle_fps
+        return fps <= 0 or time.monotonic() - self._last_retrieve >= 1 / fps
+
+    def frame_retrieved(self, frame: MatLike) -> None:
+        "Checks a retrieved frame for motion and drops to the idle rate when it's been static."
+        now = time.monotonic()
+        self._last_retrieve = now
+
+        thumbnail = cv2.resize(
+            frame, AdaptiveRateController.THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA
+        )
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        previous, self._thumbnail = self._thumbnail, thumbnail
+        if previous is not None and previous.shape == thumbnail.shape:
+            if float(cv2.absdiff(thumbnail, previous).mean()) >= self.motion_threshold:
+                self.report_activity("motion")
+                return
+
+        if self.active and now - self._last_activity >= self.idle_after:
+            self.active = False
+            logger.info(
+                f'Capture "{self.name}": static for {self.idle_after:.1f}s, '
+                f"idling at {self.idle_fps:g} fps"
+            )
+
+    def report_activity(self, reason: str = "decode") -> None:
+        "Keeps, or brings back, the active rate. Safe to call from any thread."
+        self._last_activity = time.monotonic()
+        if not self.active:
+            self.active = True
+            rate = f"{self.active_fps:g} fps" if self.active_fps > 0 else "the camera's rate"
+            logger.info(f'Capture "{self.name}": {reason}, back to {rate}')
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import override
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from configs import SCREEN_BLOCK_SIZE, SCREEN_POLL_FPS, SCREEN_REGIONS, configs
+from dirty_regions import find_dirty_regions, with_dirty_regions
+
+from .capturer_abc import Capturer
+
+__all__ = ["ScreenCapturer"]
+
+logger = logging.getLogger(__name__)
+
+FULL_SCREEN = "Full screen"
+REGION_PREFIX = "Region "
+WINDOW_PREFIX = "Window "
+
+T_REGION = tuple[int, int, int, int]
+"left, top, width, height on the screen"
+
+
+def _window_titles() -> list[str]:
+    "Titles of the open windows. Empty where window lookup isn't supported (only on Windows)."
+    try:
+        import pyautogui
+
+        titles: list[str] = pyautogui.getAllTitles()  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+    except Exception:
+        return []
+    return sorted({title for title in titles if title.strip()})
+
+
+def _window_region(title: str) -> T_REGION | None:
+    "The window's current position, it may have moved since it was selected."
+    import pyautogui
+
+    windows = pyautogui.getWindowsWithTitle(title)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+    if not windows:
+        return None
+    window = windows[0]  # pyright: ignore[reportUnknownVariableType]
+    if window.isMinimized or window.width <= 0 or window.height <= 0:  # pyright: ignore[reportUnknownMemberType]
+        return None
+    return (window.left, window.top, window.width, window.height)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+
+def _grab(region: T_REGION | None) -> MatLike:
+    # imported here, pyautogui needs a display as soon as it's imported on Linux
+    import pyautogui
+
+    image = pyautogui.screenshot(region=region)
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+
+
+class ScreenCapturer(Capturer):
+    """Captures the screen, a region of it (`screen_regions`) or a window (on Windows), to read
+    codes shown by PDFs, web portals and the like.
+
+    The screen is grabbed `screen_poll_fps` times a second, and only when the decode engine wants
+    a frame. A grab that shows no change is not passed on at all; otherwise the frame carries the
+    regions that changed since the last frame that was decoded (see `dirty_regions`), and only
+    those are decoded.
+    """
+
+    name: str | None = "Screen"
+
+    def __init__(self) -> None:
+        self._region_option: str = FULL_SCREEN
+        self._callback: Callable[[MatLike], None] | None = None
+        self._demand_callback: Callable[[], bool] | None = None
+        self._generation: int = 0
+        "Bumped by `start_capturing`, `stop_capturing` and `set_option`, older threads end."
+        self._wake: threading.Event = threading.Event()
+        "Wakes the current capture thread from its wait between grabs."
+        self._thread: threading.Thread | None = None
+        self._running: bool = False
+
+    @override
+    def start_capturing(self) -> None:
+        self._running = True
+        self._generation += 1
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._capture,
+            args=(self._generation, self._wake),
+            name="Screen Capture",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @override
+    def stop_capturing(self) -> None:
+        self._running = False
+        self._generation += 1
+        self._wake.set()
+
+    @override
+    def set_frame_callback(self, func: Callable[[MatLike], None]) -> None:
+        self._callback = func
+
+    @override
+    def set_demand_callback(self, func: Callable[[], bool] | None) -> None:
+        self._demand_callback = func
+
+    @staticmethod
+    @override
+    def available_options() -> list[str]:
+        regions = [f"{REGION_PREFIX}{x},{y} {w}x{h}" for x, y, w, h in configs[SCREEN_REGIONS]]
+        windows = [f"{WINDOW_PREFIX}{title}" for title in _window_titles()]
+        return [FULL_SCREEN, *regions, *windows]
+
+    @override
+    def set_option(self, option: str) -> None:
+        if not (
+            option == FULL_SCREEN
+            or option.startswith(REGION_PREFIX)
+            or option.startswith(WINDOW_PREFIX)
+        ):
+            raise Exception(f'Unknown screen option: "{option}"')
+        self._region_option = option
+        if self._running:
+            self.stop_capturing()
+            self.start_capturing()
+
+    def _region(self) -> T_REGION | None:
+        "The screen area to grab, `None` for the full screen."
+        option = self._region_option
+        if option.startswith(REGION_PREFIX):
+            position, size = option.removeprefix(REGION_PREFIX).split(" ")
+            x, y = (int(v) for v in position.split(","))
+            w, h = (int(v) for v in size.split("x"))
+            return (x, y, w, h)
+        if option.startswith(WINDOW_PREFIX):
+            region = _window_region(option.removeprefix(WINDOW_PREFIX))
+            if region is None:
+                raise Exception(f'Window "{option.removeprefix(WINDOW_PREFIX)}" is not visible')
+            return region
+        return None
+
+    def _capture(self, generation: int, wake: threading.Event) -> None:
+        logger.info(f'Capturing "{self._region_option}" at {configs[SCREEN_POLL_FPS]:g} fps')
+        # the last frame the pipeline decoded and its sequence number. Changes are found against
+        # it rather than the last frame passed on, which may have been dropped before being decoded
+        decoded: tuple[int, MatLike | None] = (0, None)
+
+        def on_decoded(sequence: int, frame: MatLike) -> None:
+            nonlocal decoded
+            # with several decode workers an older frame can finish last
+            if sequence > decoded[0]:
+                decoded = (sequence, frame)
+
+        # orders the frames passed on, never reset unlike the stats counters
+        sequence = 0
+        grabbed = 0
+        passed_on = 0
+        last_stats_log = time.perf_counter()
+
+        while self._generation == generation:
+            started = time.perf_counter()
+            demand = self._demand_callback
+            if demand is None or demand():
+                try:
+                    frame = _grab(self._region())
+                except Exception as e:
+                    logger.warning(f'Screen capture of "{self._region_option}" failed: {e}')
+                    frame = None
+                if frame is not None:
+                    grabbed += 1
+                    regions = find_dirty_regions(decoded[1], frame, configs[SCREEN_BLOCK_SIZE])
+                    if regions and self._callback is not None:
+                        passed_on += 1
+                        sequence += 1
+                        self._callback(
+                            with_dirty_regions(frame, regions, partial(on_decoded, sequence, frame))
+                        )
+
+            if (now := time.perf_counter()) - last_stats_log >= 10:
+                logger.debug(
+                    f"Screen capture: grabbed {grabbed}, passed on {passed_on} changed frames"
+                )
+                grabbed = passed_on = 0
+                last_stats_log = now
+
+            delay = 1 / max(configs[SCREEN_POLL_FPS], 0.1) - (time.perf_counter() - started)
+            if delay > 0:
+                _ = wake.wait(delay)
@@ -0,0 +1,233 @@
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+from cv2.typing import MatLike
+
+from frame_pool import release, retain
+
+__all__ = ["SESSION_SUFFIX", "SessionReader", "SessionRecorder"]
+
+logger = logging.getLogger(__name__)
+
+SESSION_SUFFIX = ".pbrec"
+
+# Layout, little endian:
+#   header   magic, version, index capacity, data capacity, frame count, source count
+#   sources  MAX_SOURCES null padded utf-8 names, a frame's source is an index into it
+#   index    one entry per frame: capture time, data offset, height, width, channels, source.
+#            The capture time is `time.perf_counter`, only meaningful relative to other frames
+#   data     raw uint8 frames, each starting on a FRAME_ALIGN boundary
+MAGIC = b"PBCREC01"
+VERSION = 1
+HEADER = struct.Struct("<8sIQQQI")
+FRAME_COUNT_OFFSET = 28
+"Offset of the frame count in the header, rewritten after every appended frame."
+SOURCE_COUNT_OFFSET = 36
+MAX_SOURCES = 16
+SOURCE_NAME_SIZE = 64
+INDEX_ENTRY = struct.Struct("<dQIIBB6x")
+FRAME_ALIGN = 64
+SOURCES_OFFSET = 64
+INDEX_OFFSET = SOURCES_OFFSET + MAX_SOURCES * SOURCE_NAME_SIZE
+
+
+def _align(value: int, alignment: int) -> int:
+    return -(-value // alignment) * alignment
+
+
+def _data_offset(index_capacity: int) -> int:
+    return _align(INDEX_OFFSET + index_capacity * INDEX_ENTRY.size, mmap.PAGESIZE)
+
+
+class SessionRecorder:
+    """Records the frames handed to the pipeline, with their capture times, into a memory-mapped
+    session file that `SessionReader` (and the File capturer) replays.
+
+    The file is allocated up front, so a full disk shows up when recording starts instead of as a
+    crash halfway through. Frames are appended by a background writer; `record` only queues a
+    reference to the frame, and drops it when `queue_size` frames are already waiting, so the
+    capture thread never waits on the disk. Recording stops, with a warning, when the file is
+    full. On `close` the file is truncated to the frames written.
+    """
+
+    def __init__(
+        self, path: Path, max_frames: int = 36000, data_size: int = 2**32, queue_size: int = 8
+    ) -> None:
+        self.path: Path = path
+        self.recorded: int = 0
+        self.dropped: int = 0
+        "Frames dropped because the writer was behind, or the file was full."
+        self._index_capacity: int = max_frames
+        self._data_start: int = _data_offset(max_frames)
+        self._data_end: int = self._data_start
+        self._sources: list[str] = []
+        self._full: bool = False
+
+        self._file = open(path, "w+b")
+        size = self._data_start + data_size
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(self._file.fileno(), 0, size)
+        else:
+            self._file.truncate(size)
+        self._mmap: mmap.mmap = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, max_frames, data_size, 0, 0)
+
+        self._queue: queue.Queue[tuple[float, str, MatLike] | None] = queue.Queue(queue_size)
+        self._closed: bool = False
+        self._lock: threading.Lock = threading.Lock()
+        "Held to check `_closed` and queue a frame, so no frame is queued after `close`."
+        self._writer: threading.Thread = threading.Thread(
+            target=self._write_frames, name="Session Recorder", daemon=True
+        )
+        self._writer.start()
+        logger.info(
+            f'Recording session to "{path}" (up to {max_frames} frames, {size / 2**20:.0f} MB)'
+        )
+
+    def record(self, frame: MatLike, source: str = "") -> None:
+        "Queues a frame for writing. Never blocks; the frame is dropped if the writer is behind."
+        with self._lock:
+            if self._closed or self._full:
+                return
+            retain(frame)
+            try:
+                # a wall clock step (e.g. an NTP sync) would stall or rush the replay
+                self._queue.put_nowait((time.perf_counter(), source, frame))
+            except queue.Full:
+                release(frame)
+                self.dropped += 1
+
+    def close(self) -> None:
+        "Writes the queued frames and truncates the file to them."
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+        HEADER.pack_into(
+            self._mmap,
+            0,
+            MAGIC,
+            VERSION,
+            self._index_capacity,
+            self._data_end - self._data_start,
+            self.recorded,
+            len(self._sources),
+        )
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(self._data_end)
+        self._file.close()
+        logger.info(
+            f'Recorded {self.recorded} frames to "{self.path}" '
+            f"({self._data_end / 2**20:.1f} MB, {self.dropped} dropped)"
+        )
+
+    def _write_frames(self) -> None:
+        while (item := self._queue.get()) is not None:
+            timestamp, source, frame = item
+            try:
+                if not self._full:
+                    self._append(timestamp, source, frame)
+                else:
+                    self.dropped += 1
+            except Exception as e:
+                logger.error(f"Could not record frame: {e}")
+                self.dropped += 1
+            finally:
+                release(frame)
+
+    def _append(self, timestamp: float, source: str, frame: MatLike) -> None:
+        if frame.dtype != np.uint8 or frame.ndim not in (2, 3):
+            raise Exception(f"Unsupported frame: {frame.dtype} {frame.shape}")
+        if source not in self._sources:
+            if len(self._sources) == MAX_SOURCES:
+                raise Exception(f'Too many sources to record "{source}"')
+            name = source.encode()[:SOURCE_NAME_SIZE]
+            start = SOURCES_OFFSET + len(self._sources) * SOURCE_NAME_SIZE
+            self._mmap[start : start + len(name)] = name
+            self._sources.append(source)
+            struct.pack_into("<I", self._mmap, SOURCE_COUNT_OFFSET, len(self._sources))
+
+        offset = _align(self._data_end, FRAME_ALIGN)
+        if self.recorded == self._index_capacity or offset + frame.nbytes > len(self._mmap):
+            self._full = True
+            self.dropped += 1
+            logger.warning(f'Session file "{self.path}" is full, recording stopped')
+            return
+
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        target = np.ndarray(frame.shape, np.uint8, buffer=self._mmap, offset=offset)
+        np.copyto(target, frame)
+        del target  # the map can't be closed while an array still points into it
+
+        INDEX_ENTRY.pack_into(
+            self._mmap,
+            INDEX_OFFSET + self.recorded * INDEX_ENTRY.size,
+            timestamp,
+            offset,
+            height,
+            width,
+            channels,
+            self._sources.index(source),
+        )
+        self._data_end = offset + frame.nbytes
+        self.recorded += 1
+        # the frame is only counted once its data and index entry are in place
+        struct.pack_into("<Q", self._mmap, FRAME_COUNT_OFFSET, self.recorded)
+
+
+class SessionReader:
+    """Reads a file written by `SessionRecorder`. Frames are read-only views of the memory-mapped
+    file, nothing is copied until a consumer does it."""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        with open(path, "rb") as file:
+            self._mmap: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, _, frame_count, source_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f'"{path}" is not a recorded session')
+        self.frame_count: int = frame_count
+        self.sources: list[str] = []
+        "Recorded sources in the order they first appeared."
+        for i in range(source_count):
+            start = SOURCES_OFFSET + i * SOURCE_NAME_SIZE
+            name = self._mmap[start : start + SOURCE_NAME_SIZE].rstrip(b"\0")
+            self.sources.append(name.decode(errors="replace"))
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def frame(self, i: int) -> tuple[float, str, MatLike]:
+        "Capture time (see the layout), source and a read-only view of the `i`th frame."
+        timestamp, offset, height, width, channels, source = INDEX_ENTRY.unpack_from(
+            self._mmap, INDEX_OFFSET + i * INDEX_ENTRY.size
+        )
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        frame = np.frombuffer(self._mmap, np.uint8, height * width * channels, offset)
+        return timestamp, self.sources[source], frame.reshape(shape)
+
+    def frames(self, source: str | None = None) -> Iterator[tuple[float, MatLike]]:
+        "Capture times and frames, of every source or only of `source`."
+        for i in range(self.frame_count):
+            timestamp, frame_source, frame = self.frame(i)
+            if source is None or frame_source == source:
+                yield timestamp, frame
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # frames are still in use, the map is released with the last of them
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import override
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from configs import FRAME_POOL_SIZE, STREAM_RECONNECT_MAX, STREAM_TIMEOUT, STREAM_URLS, configs
+from frame_pool import FramePool, release
+
+from .capturer_abc import Capturer
+
+__all__ = ["StreamCapturer"]
+
+logger = logging.getLogger(__name__)
+
+STATS_LOG_INTERVAL = 10.0
+RECONNECT_MIN = 0.5
+"Seconds before the first reconnect attempt, doubled after every failed one."
+
+
+def _open_stream(url: str) -> cv2.VideoCapture | None:
+    timeout_ms = int(configs[STREAM_TIMEOUT] * 1000)
+    stream = cv2.VideoCapture(
+        url,
+        cv2.CAP_FFMPEG,
+        [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms],
+    )
+    if not stream.isOpened():
+        stream.release()
+        return None
+    return stream
+
+
+class StreamCapturer(Capturer):
+    """Captures from an IP camera stream (MJPEG over HTTP, RTSP, anything FFmpeg reads) listed
+    in `stream_urls`.
+
+    A reader thread grabs every frame as it arrives, so the connection's buffer never holds stale
+    frames, and only retrieves (converts) the newest one when the consumer wants a frame. When the
+    stream fails to open or stops delivering, it's reopened after a delay that doubles up to
+    `stream_reconnect_max` seconds. All of it happens on the reader thread, starting, stopping
+    and switching return right away.
+    """
+
+    name: str | None = "Stream"
+    requires_option: bool = True
+
+    def __init__(self) -> None:
+        self._url: str | None = None
+        self._callback: Callable[[MatLike], None] | None = None
+        self._demand_callback: Callable[[], bool] | None = None
+        self._generation: int = 0
+        "Bumped by `start_capturing`, `stop_capturing` and `set_option`, older threads end."
+        self._wake: threading.Event = threading.Event()
+        "Wakes the current reader thread from a reconnect delay."
+        self._thread: threading.Thread | None = None
+        self._running: bool = False
+        self.connects: int = 0
+        "Successful (re)connections, for monitoring."
+        self.grabbed: int = 0
+        "Frames grabbed from the stream since the last stats log."
+        self.retrieved: int = 0
+        "Frames of those that were also retrieved and passed on."
+
+    @override
+    def start_capturing(self) -> None:
+        self._running = True
+        self._generation += 1
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._capture,
+            args=(self._generation, self._wake),
+            name="Stream Capture",
+        )
+        self._thread.start()
+
+    @override
+    def stop_capturing(self) -> None:
+        "Returns right away. The reader thread closes the stream when its current read returns."
+        self._running = False
+        self._generation += 1
+        self._wake.set()
+
+    @override
+    def set_frame_callback(self, func: Callable[[MatLike], None]) -> None:
+        self._callback = func
+
+    @override
+    def set_demand_callback(self, func: Callable[[], bool] | None) -> None:
+        self._demand_callback = func
+
+    @staticmethod
+    @override
+    def available_options() -> list[str]:
+        return list(configs[STREAM_URLS])
+
+    @override
+    def set_option(self, option: str) -> None:
+        self._url = option
+        if self._running:
+            self.stop_capturing()
+            self.start_capturing()
+
+    def _capture(self, generation: int, wake: threading.Event) -> None:
+        url = self._url
+        if url is None:
+            logger.warning("No stream selected")
+            return
+
+        delay = RECONNECT_MIN
+        while self._generation == generation:
+            logger.info(f'Connecting to stream "{url}"')
+            stream = _open_stream(url)
+            if stream is not None:
+                self.connects += 1
+                read_any = self._read_stream(generation, stream)
+                stream.release()
+                if read_any:
+                    delay = RECONNECT_MIN
+                if self._generation != generation:
+                    break
+                logger.warning(f'Stream "{url}" stopped delivering frames')
+
+            logger.info(f'Reconnecting to "{url}" in {delay:g}s')
+            if wake.wait(delay):
+                break
+            delay = min(delay * 2, configs[STREAM_RECONNECT_MAX])
+
+    def _read_stream(self, generation: int, stream: cv2.VideoCapture) -> bool:
+        "Reads until the stream fails or capturing stops. Whether any frame was read."
+        read_any = False
+        pool = FramePool(configs[FRAME_POOL_SIZE]) if configs[FRAME_POOL_SIZE] > 0 else None
+        # shape and dtype of the last frame read, to size the pooled buffers
+        layout: tuple[tuple[int, ...], np.dtype[np.generic]] | None = None
+        last_stats_log = time.perf_counter()
+        while self._generation == generation:
+            # logged first, frames that aren't wanted skip the rest of the loop
+            now = time.perf_counter()
+            if now - last_stats_log >= STATS_LOG_INTERVAL:
+                logger.debug(f"Stream: {self.grabbed} frames grabbed, {self.retrieved} retrieved")
+                self.grabbed = 0
+                self.retrieved = 0
+                last_stats_log = now
+
+            # times out after `stream_timeout` seconds without data
+            if not stream.grab():
+                return read_any
+            read_any = True
+            self.grabbed += 1
+            demand = self._demand_callback
+            if demand is not None and not demand():
+                continue
+
+            buffer = pool.acquire(*layout) if pool is not None and layout is not None else None
+            is_reading, img = stream.retrieve(buffer)
+            if buffer is not None and img is not buffer:
+                # OpenCV allocated a new array, the frame size changed
+                release(buffer)
+            if is_reading:
+                layout = (img.shape, img.dtype)
+                self.retrieved += 1
+                if self._callback is not None:
+                    self._callback(img)
+                # consumers that keep the frame have retained it in the callback
+                release(img)
+            elif buffer is not None and img is buffer:
+                release(buffer)
+        return read_any
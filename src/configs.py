@@ -4,6 +4,25 @@ from typing import Literal, TypedDict, TypeVar, override
 from file_system import CONFIG_FILE
 
 
+class CaptureProfile(TypedDict, total=False):
+    "Capture settings for one camera. Missing keys are left to the driver."
+
+    width: int
+    height: int
+    fps: float
+    fourcc: str
+    "Pixel format, e.g. `MJPG` or `YUYV`."
+    buffer_size: int
+    "Frames the driver queues. 1 keeps the latency lowest."
+
+
+class CaptureTarget(TypedDict):
+    "What to pick when probing camera modes, e.g. max fps at >= 720p."
+
+    min_height: int
+    prefer: Literal["fps", "resolution"]
+
+
 # NOTE: below is just a TypedDict for type hinting. The actual Config dict is `Config`
 class T_CONFIG_DATA(TypedDict):
     window_geo: Literal["center"] | tuple[int, int, int, int]
@@ -14,6 +33,69 @@ class T_CONFIG_DATA(TypedDict):
     play_beep: bool
     capture: Literal["auto"] | str
     flip_frames: bool
+    roi_tracking: bool
+    roi_margin: float
+    roi_full_scan_interval: int
+    pyramid_scales: list[float]
+    symbologies: Literal["all"] | list[str]
+    decoder_backend: Literal["auto"] | str
+    calibration_frames: int
+    change_gating: bool
+    change_threshold: float
+    forced_decode_interval: float
+    min_sharpness: float
+    prefer_sharpest: bool
+    "Decode the sharpest waiting frame. Every frame is retrieved to score it, even on demand."
+    batch_mode: bool
+    tiled_decode: bool
+    tile_size: int
+    tile_overlap: int
+    tile_workers: Literal["auto"] | int
+    decode_workers: Literal["auto"] | int
+    localization: Literal["off", "gradient", "opencv"]
+    capture_profiles: dict[str, CaptureProfile]
+    "Per camera capture settings, keyed by the capture option (camera name)."
+    capture_target: CaptureTarget
+    grab_on_demand: bool
+    grayscale_capture: bool
+    frame_pool_size: int
+    "Reusable frame buffers per camera. 0 allocates a new array for every frame."
+    extra_captures: list[str]
+    "Capture options captured and decoded at the same time as `capture`."
+    camera_watch_interval: float
+    "Seconds between camera re-enumerations to pick up hot-plugged cameras. 0 turns it off."
+    warm_cameras: int
+    "Cameras kept open after switching away, for an instant switch back. 0 closes them."
+    adaptive_rate: bool
+    "Retrieve frames at `idle_fps` while the scene is static."
+    idle_fps: float
+    active_fps: float
+    "Frame rate while there is activity. 0 is the camera's rate."
+    idle_after: float
+    "Seconds without motion or decodes before dropping to `idle_fps`."
+    replay_sources: list[str]
+    "Video files and image directories offered by the File capturer."
+    replay_fps: float
+    "Frame rate of image directories, and of videos that don't report one, replayed in realtime."
+    replay_loop: bool
+    record_max_frames: int
+    "Frames a recorded session (`--record`) can hold."
+    record_size_mb: int
+    "Disk space allocated for a recorded session's frames."
+    record_queue_size: int
+    "Frames waiting to be written before new ones are dropped instead of slowing capture."
+    screen_poll_fps: float
+    "How often the Screen capturer grabs the screen."
+    screen_regions: list[tuple[int, int, int, int]]
+    "Screen areas (left, top, width, height) offered as Screen capture options."
+    screen_block_size: int
+    "Side of the squares the screen is compared in to find what changed."
+    stream_urls: list[str]
+    "IP camera streams (MJPEG over HTTP, RTSP) offered as Stream capture options."
+    stream_timeout: float
+    "Seconds to wait for a stream to open, or for its next frame, before reconnecting."
+    stream_reconnect_max: float
+    "Longest delay between reconnect attempts, the delay doubles from 0.5s after each failure."
 
 
 WINDOW_GEO = "window_geo"
@@ -24,6 +106,49 @@ PRESS_ENTER = "press_enter"
 PLAY_BEEP = "play_beep"
 CAPTURE = "capture"
 FLIP_FRAMES = "flip_frames"
+ROI_TRACKING = "roi_tracking"
+ROI_MARGIN = "roi_margin"
+ROI_FULL_SCAN_INTERVAL = "roi_full_scan_interval"
+PYRAMID_SCALES = "pyramid_scales"
+SYMBOLOGIES = "symbologies"
+DECODER_BACKEND = "decoder_backend"
+CALIBRATION_FRAMES = "calibration_frames"
+CHANGE_GATING = "change_gating"
+CHANGE_THRESHOLD = "change_threshold"
+FORCED_DECODE_INTERVAL = "forced_decode_interval"
+MIN_SHARPNESS = "min_sharpness"
+PREFER_SHARPEST = "prefer_sharpest"
+BATCH_MODE = "batch_mode"
+TILED_DECODE = "tiled_decode"
+TILE_SIZE = "tile_size"
+TILE_OVERLAP = "tile_overlap"
+TILE_WORKERS = "tile_workers"
+DECODE_WORKERS = "decode_workers"
+LOCALIZATION = "localization"
+CAPTURE_PROFILES = "capture_profiles"
+CAPTURE_TARGET = "capture_target"
+GRAB_ON_DEMAND = "grab_on_demand"
+GRAYSCALE_CAPTURE = "grayscale_capture"
+FRAME_POOL_SIZE = "frame_pool_size"
+EXTRA_CAPTURES = "extra_captures"
+CAMERA_WATCH_INTERVAL = "camera_watch_interval"
+WARM_CAMERAS = "warm_cameras"
+ADAPTIVE_RATE = "adaptive_rate"
+IDLE_FPS = "idle_fps"
+ACTIVE_FPS = "active_fps"
+IDLE_AFTER = "idle_after"
+REPLAY_SOURCES = "replay_sources"
+REPLAY_FPS = "replay_fps"
+REPLAY_LOOP = "replay_loop"
+RECORD_MAX_FRAMES = "record_max_frames"
+RECORD_SIZE_MB = "record_size_mb"
+RECORD_QUEUE_SIZE = "record_queue_size"
+SCREEN_POLL_FPS = "screen_poll_fps"
+SCREEN_REGIONS = "screen_regions"
+SCREEN_BLOCK_SIZE = "screen_block_size"
+STREAM_URLS = "stream_urls"
+STREAM_TIMEOUT = "stream_timeout"
+STREAM_RECONNECT_MAX = "stream_reconnect_max"
 
 DEFAULT_VALUES: T_CONFIG_DATA = {
     WINDOW_GEO: "center",
@@ -34,6 +159,49 @@ DEFAULT_VALUES: T_CONFIG_DATA = {
     PLAY_BEEP: True,
     CAPTURE: "auto",
     FLIP_FRAMES: False,
+    ROI_TRACKING: True,
+    ROI_MARGIN: 0.5,
+    ROI_FULL_SCAN_INTERVAL: 15,
+    PYRAMID_SCALES: [0.5, 1.0],
+    SYMBOLOGIES: "all",
+    DECODER_BACKEND: "pyzbar",
+    CALIBRATION_FRAMES: 10,
+    CHANGE_GATING: True,
+    CHANGE_THRESHOLD: 4.0,
+    FORCED_DECODE_INTERVAL: 1.0,
+    MIN_SHARPNESS: 0.0,
+    PREFER_SHARPEST: False,
+    BATCH_MODE: False,
+    TILED_DECODE: False,
+    TILE_SIZE: 1024,
+    TILE_OVERLAP: 256,
+    TILE_WORKERS: "auto",
+    DECODE_WORKERS: 1,
+    LOCALIZATION: "off",
+    CAPTURE_PROFILES: {},
+    CAPTURE_TARGET: {"min_height": 720, "prefer": "fps"},
+    GRAB_ON_DEMAND: True,
+    GRAYSCALE_CAPTURE: False,
+    FRAME_POOL_SIZE: 6,
+    EXTRA_CAPTURES: [],
+    CAMERA_WATCH_INTERVAL: 0.0,
+    WARM_CAMERAS: 2,
+    ADAPTIVE_RATE: True,
+    IDLE_FPS: 5.0,
+    ACTIVE_FPS: 0.0,
+    IDLE_AFTER: 2.0,
+    REPLAY_SOURCES: [],
+    REPLAY_FPS: 30.0,
+    REPLAY_LOOP: False,
+    RECORD_MAX_FRAMES: 36000,
+    RECORD_SIZE_MB: 4096,
+    RECORD_QUEUE_SIZE: 8,
+    SCREEN_POLL_FPS: 4.0,
+    SCREEN_REGIONS: [],
+    SCREEN_BLOCK_SIZE: 32,
+    STREAM_URLS: [],
+    STREAM_TIMEOUT: 5.0,
+    STREAM_RECONNECT_MAX: 30.0,
 }
 
 
@@ -42,7 +210,7 @@ _VT = TypeVar("_VT")
 
 
 if not CONFIG_FILE.parent.exists():
-    CONFIG_FILE.parent.mkdir()
+    CONFIG_FILE.parent.mkdir(parents=True)
 
 if not CONFIG_FILE.exists():
     _ = CONFIG_FILE.write_text(json.dumps(DEFAULT_VALUES, indent=4))
@@ -65,7 +233,8 @@ class Config(dict[_KT, _VT]):
             data = json.loads(CONFIG_FILE.read_text("utf-8"))
         except json.JSONDecodeError as e:
             raise NotImplementedError
-        super().__init__(data)
+        # fill keys added after the config file was written
+        super().__init__({**DEFAULT_VALUES, **data})
 
     @override
     def __setitem__(self, key: _KT, value: _VT, /) -> None:
@@ -1,19 +1,91 @@
-import cv2
+from typing import NamedTuple
+
+import numpy as np
 from cv2.typing import MatLike
-from pyzbar.pyzbar import decode
+from pyzbar.pyzbar import ZBarSymbol, decode
+
+__all__ = [
+    "SUPPORTED_SYMBOLOGIES",
+    "Detection",
+    "Rect",
+    "decode_barcodes",
+    "detect_code",
+    "sort_spatially",
+]
+
+Rect = tuple[int, int, int, int]
+"x, y, width, height"
+
+SUPPORTED_SYMBOLOGIES: list[str] = [
+    symbol.name
+    for symbol in ZBarSymbol
+    if symbol not in (ZBarSymbol.NONE, ZBarSymbol.PARTIAL, ZBarSymbol.COMPOSITE)
+]
+"Names of the symbologies that can be put in the allow-list."
+
+
+class Detection(NamedTuple):
+    data: str
+    symbology: str
+    "One of `SUPPORTED_SYMBOLOGIES`, or the decoder's own name for types zbar doesn't know."
+    rect: Rect
+    quality: int
+    "Decoder reported quality. Higher is better, only comparable within one backend."
 
-__all__ = ["detect_code"]
 
+def decode_barcodes(
+    frame: MatLike,
+    region: Rect | None = None,
+    symbologies: list[str] | None = None,
+) -> list[Detection]:
+    """Decodes the barcodes in the frame, or only inside `region` if given.
+    Returned rects are always in the coordinates of the whole frame.
 
-def detect_code(frame: MatLike) -> tuple[str, MatLike]:
-    barcodes = decode(frame)  # pyright: ignore[reportUnknownVariableType]
-    code = ""
-    for barcode in barcodes:  # pyright: ignore[reportUnknownVariableType]
+    `symbologies` restricts the search to the given `SUPPORTED_SYMBOLOGIES` names.
+    `None` searches all.
+    """
+    symbols = [ZBarSymbol[name] for name in symbologies] if symbologies else None
+
+    offset_x, offset_y = 0, 0
+    image = frame
+    if region is not None:
+        offset_x, offset_y, w, h = region
+        image = frame[offset_y : offset_y + h, offset_x : offset_x + w]
+
+    results: list[Detection] = []
+    # a plain ndarray view: pyzbar tells arrays apart by type name, and would take subclasses
+    # (pooled and dirty frames) for a (pixels, width, height) tuple
+    for barcode in decode(np.asarray(image), symbols):  # pyright: ignore[reportUnknownVariableType]
         x, y, w, h = barcode.rect  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
         code: str = barcode.data.decode("utf-8")  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
-        _ = cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)  # pyright: ignore[reportUnknownArgumentType]
+        results.append(
+            Detection(
+                code,
+                barcode.type,  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+                (x + offset_x, y + offset_y, w, h),  # pyright: ignore[reportUnknownArgumentType]
+                barcode.quality,  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+            )
+        )
+    return results
+
+
+def sort_spatially(detections: list[Detection]) -> list[Detection]:
+    """Sorts detections top-to-bottom, then left-to-right. Detections whose vertical centers are
+    within half a code height of a row's first detection are treated as the same row, so labels
+    that are slightly out of line still read in row order."""
+    rows: list[list[Detection]] = []
+    for detection in sorted(detections, key=lambda d: d.rect[1] + d.rect[3] / 2):
+        _, y, _, h = detection.rect
+        if rows:
+            _, row_y, _, row_h = rows[-1][0].rect
+            if abs((y + h / 2) - (row_y + row_h / 2)) <= max(h, row_h) / 2:
+                rows[-1].append(detection)
+                continue
+        rows.append([detection])
+
+    return [detection for row in rows for detection in sorted(row, key=lambda d: d.rect[0])]
 
-        # font = cv2.FONT_HERSHEY_DUPLEX
-        # _ = cv2.putText(frame, code, (x + 6, y - 6), font, 2.0, (255, 255, 255), 1)  # pyright: ignore[reportUnknownArgumentType]
 
-    return code, frame  # pyright: ignore[reportUnknownVariableType]
+def detect_code(frame: MatLike, region: Rect | None = None) -> list[Detection]:
+    "Decodes the frame without modifying it. Results are sorted with `sort_spatially`."
+    return sort_spatially(decode_barcodes(frame, region))
@@ -0,0 +1,44 @@
+from .backends import BACKENDS, DecoderBackend, OpenCVBackend, PyzbarBackend
+from .calibration import BackendCalibrator, calibrate
+from .change_gate import ChangeGate
+from .decode_engine import (
+    DecodeEngine,
+    LatestFrameMailbox,
+    MailboxItem,
+    ResultSequencer,
+    SharpestFrameMailbox,
+    resolve_worker_count,
+)
+from .localizer import LOCALIZERS, GradientLocalizer, Localizer, OpenCVLocalizer
+from .pipeline import DetectionPipeline
+from .roi_tracker import RoiTracker
+from .sharpness import sharpness_score
+from .stage_timer import StageTimer
+from .tiling import TiledBackend, merge_detections, split_tiles
+
+__all__ = [
+    "BACKENDS",
+    "BackendCalibrator",
+    "ChangeGate",
+    "DecodeEngine",
+    "DecoderBackend",
+    "DetectionPipeline",
+    "GradientLocalizer",
+    "LOCALIZERS",
+    "LatestFrameMailbox",
+    "Localizer",
+    "MailboxItem",
+    "OpenCVBackend",
+    "OpenCVLocalizer",
+    "PyzbarBackend",
+    "ResultSequencer",
+    "RoiTracker",
+    "SharpestFrameMailbox",
+    "StageTimer",
+    "TiledBackend",
+    "calibrate",
+    "merge_detections",
+    "resolve_worker_count",
+    "sharpness_score",
+    "split_tiles",
+]
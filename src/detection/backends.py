@@ -0,0 +1,100 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import override
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from detect_code import Detection, Rect, decode_barcodes
+
+__all__ = ["BACKENDS", "DecoderBackend", "OpenCVBackend", "PyzbarBackend", "get_backend"]
+
+
+class DecoderBackend(ABC):
+    name: str = ""
+    "Name used to select the backend in the configs."
+
+    @abstractmethod
+    def decode(self, image: MatLike, symbologies: list[str] | None) -> list[Detection]:
+        """Decodes every barcode in the image. `symbologies` are `SUPPORTED_SYMBOLOGIES` names to
+        restrict the search to. `None` searches all."""
+
+
+class PyzbarBackend(DecoderBackend):
+    name: str = "pyzbar"
+
+    @override
+    def decode(self, image: MatLike, symbologies: list[str] | None) -> list[Detection]:
+        return decode_barcodes(image, symbologies=symbologies)
+
+
+_OPENCV_TO_ZBAR_TYPES: dict[str, str] = {
+    "EAN_8": "EAN8",
+    "EAN_13": "EAN13",
+    "UPC_A": "UPCA",
+    "UPC_E": "UPCE",
+    "CODE_39": "CODE39",
+    "CODE_93": "CODE93",
+    "CODE_128": "CODE128",
+    "ITF": "I25",
+}
+"Maps OpenCV's barcode type names to the zbar names used in the allow-list."
+
+
+class OpenCVBackend(DecoderBackend):
+    """Uses `cv2.barcode.BarcodeDetector` for linear codes and `cv2.QRCodeDetector` for QR codes.
+    OpenCV detectors are not thread safe, so each decode thread gets its own instances."""
+
+    name: str = "opencv"
+
+    def __init__(self) -> None:
+        self._local: threading.local = threading.local()
+
+    @override
+    def decode(self, image: MatLike, symbologies: list[str] | None) -> list[Detection]:
+        want_qr = symbologies is None or "QRCODE" in symbologies
+        want_linear = symbologies is None or any(s != "QRCODE" for s in symbologies)
+
+        results: list[Detection] = []
+        if want_linear:
+            ok, infos, types, points = self._barcode_detector().detectAndDecodeWithType(image)
+            if ok:
+                for info, type_, corners in zip(infos, types, points):
+                    symbology = _OPENCV_TO_ZBAR_TYPES.get(type_, type_)
+                    if info and (symbologies is None or symbology in symbologies):
+                        results.append(Detection(info, symbology, _bounding_rect(corners), 1))
+
+        if want_qr:
+            ok, infos, points, _ = self._qr_detector().detectAndDecodeMulti(image)
+            if ok:
+                for info, corners in zip(infos, points):
+                    if info:
+                        results.append(Detection(info, "QRCODE", _bounding_rect(corners), 1))
+
+        return results
+
+    def _barcode_detector(self) -> cv2.barcode.BarcodeDetector:
+        if (detector := getattr(self._local, "barcode", None)) is None:
+            detector = self._local.barcode = cv2.barcode.BarcodeDetector()
+        return detector
+
+    def _qr_detector(self) -> cv2.QRCodeDetector:
+        if (detector := getattr(self._local, "qr", None)) is None:
+            detector = self._local.qr = cv2.QRCodeDetector()
+        return detector
+
+
+def _bounding_rect(corners: MatLike) -> Rect:
+    x, y, w, h = cv2.boundingRect(np.asarray(corners, dtype=np.int32).reshape(-1, 2))
+    return int(x), int(y), int(w), int(h)
+
+
+BACKENDS: tuple[type[DecoderBackend], ...] = (PyzbarBackend, OpenCVBackend)
+
+
+def get_backend(name: str) -> DecoderBackend:
+    for backend in BACKENDS:
+        if backend.name == name:
+            return backend()
+    raise Exception(f'Unknown decoder backend: "{name}"')
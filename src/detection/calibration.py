@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from cv2.typing import MatLike
+
+from .backends import BACKENDS, DecoderBackend
+
+__all__ = ["BackendCalibrator", "calibrate"]
+
+logger = logging.getLogger(__name__)
+
+T_RESULTS = dict[str, tuple[float, int]]
+"Backend name -> (average seconds per frame, codes read)."
+
+MISS_SAMPLE_INTERVAL: int = 10
+"While calibrating, one in this many images without codes is tried with the other backends."
+
+
+def calibrate(
+    images: list[MatLike],
+    backends: list[DecoderBackend],
+    symbologies: list[str] | None = None,
+) -> tuple[DecoderBackend, T_RESULTS]:
+    """Decodes `images` with each backend and returns the fastest backend among those that read
+    as many codes as the best one, along with every backend's timing."""
+    results: T_RESULTS = {}
+    for backend in backends:
+        reads = 0
+        start = time.perf_counter()
+        for image in images:
+            reads += len(backend.decode(image, symbologies))
+        results[backend.name] = ((time.perf_counter() - start) / max(1, len(images)), reads)
+
+    most_reads = max(reads for _, reads in results.values())
+    fastest = min(
+        (b for b in backends if results[b.name][1] == most_reads),
+        key=lambda b: results[b.name][0],
+    )
+    return fastest, results
+
+
+class BackendCalibrator:
+    """Collects recent images that had codes in them and, once enough are collected, runs
+    `calibrate` over them to pick the backend for the "auto" decoder setting.
+
+    Images the selected backend read nothing in are sampled too (`sample_miss`), and collected
+    when another backend reads a code in them, so the calibration still happens when the first
+    backend can't read the codes in use."""
+
+    def __init__(self, frames_needed: int) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._images: deque[MatLike] = deque(maxlen=max(1, frames_needed))
+        self._backends: list[DecoderBackend] = [backend() for backend in BACKENDS]
+        self.selected: DecoderBackend = self._backends[0]
+        "Backend to use. The first registered backend until calibration is done."
+        self.calibrated: bool = False
+        self._misses: int = 0
+
+    def add(self, image: MatLike, symbologies: list[str] | None) -> None:
+        "Adds an image with codes in it. Calibrates when enough images are collected."
+        with self._lock:
+            if self.calibrated:
+                return
+            # keep a copy, the image may be a view into a capture buffer
+            self._images.append(image.copy())
+            if len(self._images) < (self._images.maxlen or 1):
+                return
+            self.selected, results = calibrate(list(self._images), self._backends, symbologies)
+            self.calibrated = True
+            self._images.clear()
+
+        table = ", ".join(
+            f"{name}: {seconds * 1000:.2f}ms/{reads} reads"
+            for name, (seconds, reads) in results.items()
+        )
+        logger.info(f'Decoder calibration picked "{self.selected.name}" ({table})')
+
+    def sample_miss(self) -> bool:
+        "Counts an image without codes. Whether to pass it to `add_miss`."
+        with self._lock:
+            if self.calibrated:
+                return False
+            self._misses += 1
+            return self._misses % MISS_SAMPLE_INTERVAL == 0
+
+    def add_miss(self, image: MatLike, symbologies: list[str] | None) -> None:
+        "Adds an image the selected backend read nothing in, if another backend reads a code."
+        others = [backend for backend in self._backends if backend is not self.selected]
+        if any(backend.decode(image, symbologies) for backend in others):
+            self.add(image, symbologies)
+
+    def reset(self) -> None:
+        "Forgets the calibration, so the next images start a new one."
+        with self._lock:
+            self.calibrated = False
+            self._images.clear()
+            self._misses = 0
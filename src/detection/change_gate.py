@@ -0,0 +1,50 @@
+import threading
+import time
+
+import cv2
+from cv2.typing import MatLike
+
+from .preprocess import to_gray
+
+__all__ = ["ChangeGate"]
+
+
+class ChangeGate:
+    """Cheap scene change detector. Compares a small grayscale thumbnail of each frame with the
+    thumbnail of the last decoded frame and tells whether the frame is worth decoding.
+
+    Comparing against the last *decoded* frame (instead of the previous frame) means slow drift
+    still triggers a decode once it adds up to the threshold.
+    """
+
+    THUMBNAIL_SIZE: tuple[int, int] = (64, 48)
+
+    def __init__(self, threshold: float, forced_interval: float) -> None:
+        self.threshold: float = threshold
+        "Mean absolute difference (0-255 gray levels) that counts as a change."
+        self.forced_interval: float = forced_interval
+        "Seconds after which a frame is decoded even if nothing changed."
+
+        self._lock: threading.Lock = threading.Lock()
+        self._reference: MatLike | None = None
+        self._last_decode: float = 0.0
+
+    def should_decode(self, frame: MatLike) -> bool:
+        thumbnail = to_gray(
+            cv2.resize(frame, ChangeGate.THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        )
+        now = time.monotonic()
+        with self._lock:
+            if self._reference is None or now - self._last_decode >= self.forced_interval:
+                changed = True
+            else:
+                changed = float(cv2.absdiff(thumbnail, self._reference).mean()) >= self.threshold
+
+            if changed:
+                self._reference = thumbnail
+                self._last_decode = now
+            return changed
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reference = None
@@ -0,0 +1,342 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Literal, NamedTuple, override
+
+from cv2.typing import MatLike
+
+from detect_code import Detection
+from frame_pool import release, retain
+
+from .sharpness import sharpness_score
+
+__all__ = [
+    "DecodeEngine",
+    "LatestFrameMailbox",
+    "MailboxItem",
+    "ResultSequencer",
+    "SharpestFrameMailbox",
+    "resolve_worker_count",
+]
+
+logger = logging.getLogger(__name__)
+
+T_DETECTOR = Callable[[MatLike], list[Detection]]
+T_DELIVER = Callable[[list[Detection], MatLike], None]
+T_RESULT_CALLBACK = Callable[[list[Detection], MatLike, str], None]
+
+STATS_LOG_INTERVAL: float = 5.0
+"Seconds between the engine's throughput log lines."
+
+
+def resolve_worker_count(setting: Literal["auto"] | int) -> int:
+    """Turns a worker count setting into a count. `"auto"` sizes it to the CPU count."""
+    if setting == "auto":
+        return os.cpu_count() or 1
+    return max(1, setting)
+
+
+class MailboxItem(NamedTuple):
+    frame: MatLike
+    score: float | None
+    "Sharpness score. `None` when not scored."
+    sequence: int
+    "Capture order of the frame."
+    source: str = ""
+    "Capture source the frame came from."
+
+
+class LatestFrameMailbox:
+    """Mailbox with a single slot per capture source. Putting a frame replaces the frame of the
+    same source that is not taken yet, so the consumer always gets the freshest frame and never
+    works through a backlog.
+
+    Sources are taken from in turn, so when the consumers can't keep up every source still gets
+    an equal share of them.
+    """
+
+    def __init__(self) -> None:
+        self._condition: threading.Condition = threading.Condition()
+        self._items: dict[str, MailboxItem] = {}
+        self._sources: list[str] = []
+        "Every source seen, in the order they are taken from."
+        self._next: int = 0
+        "Index in `_sources` to start looking from on the next take."
+        self._closed: bool = False
+        self._waiting: int = 0
+        "Consumers blocked in `take`."
+        self.dropped: int = 0
+        "Frames replaced before any worker took them."
+
+    def put(self, item: MailboxItem) -> None:
+        with self._condition:
+            self._add_source(item.source)
+            if (waiting := self._items.get(item.source)) is not None:
+                self.dropped += 1
+                release(waiting.frame)
+            self._items[item.source] = item
+            self._condition.notify()
+
+    def take(self, on_take: Callable[[MailboxItem], None] | None = None) -> MailboxItem | None:
+        """Blocks until a frame is available. Returns `None` once the mailbox is closed.
+        `on_take` is called with the item before another worker can take a newer one.
+        """
+        with self._condition:
+            self._waiting += 1
+            while not self._items and not self._closed:
+                _ = self._condition.wait()
+            self._waiting -= 1
+            item = self._pop_next()
+            if item is not None and on_take is not None:
+                on_take(item)
+            return item
+
+    def wants_item(self, source: str = "") -> bool:
+        "Whether a put item of `source` would be taken right away, because a consumer is idle."
+        with self._condition:
+            return source not in self._items and self._waiting > 0
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            for item in self._items.values():
+                release(item.frame)
+            self._items.clear()
+            self._condition.notify_all()
+
+    def open(self) -> None:
+        with self._condition:
+            self._closed = False
+
+    def _add_source(self, source: str) -> None:
+        if source not in self._sources:
+            self._sources.append(source)
+
+    def _pop_next(self) -> MailboxItem | None:
+        "Round robin: takes from the first source with a frame, starting after the last one."
+        count = len(self._sources)
+        for offset in range(count):
+            index = (self._next + offset) % count
+            if (item := self._items.pop(self._sources[index], None)) is not None:
+                self._next = (index + 1) % count
+                return item
+        return None
+
+
+class SharpestFrameMailbox(LatestFrameMailbox):
+    """Like `LatestFrameMailbox`, but a new frame only replaces the waiting one if it is at least
+    as sharp. While the workers are busy the sharpest frame since the last take wins, which is
+    still at most one decode old."""
+
+    @override
+    def put(self, item: MailboxItem) -> None:
+        with self._condition:
+            self._add_source(item.source)
+            if (waiting := self._items.get(item.source)) is not None:
+                self.dropped += 1
+                if waiting.score is not None and item.score is not None:
+                    if item.score < waiting.score:
+                        release(item.frame)
+                        return
+                release(waiting.frame)
+            self._items[item.source] = item
+            self._condition.notify()
+
+    @override
+    def wants_item(self, source: str = "") -> bool:
+        # picking the sharpest frame needs every frame to compare, which is why `prefer_sharpest`
+        # is off by default
+        return True
+
+
+class ResultSequencer:
+    """Delivers the results of concurrently decoded frames in capture order.
+
+    A result is held back while an older frame is still being decoded, and delivered as soon as
+    every older frame is done. Frames the mailbox dropped never started, so they don't hold
+    anything back.
+    """
+
+    def __init__(self, deliver: T_DELIVER) -> None:
+        self._deliver: T_DELIVER = deliver
+        self._lock: threading.Lock = threading.Lock()
+        self._in_flight: set[int] = set()
+        self._finished: dict[int, tuple[list[Detection], MatLike]] = {}
+
+    def started(self, sequence: int) -> None:
+        with self._lock:
+            self._in_flight.add(sequence)
+
+    def finished(self, sequence: int, detections: list[Detection], frame: MatLike) -> None:
+        with self._lock:
+            self._in_flight.discard(sequence)
+            self._finished[sequence] = (detections, frame)
+            oldest_in_flight = min(self._in_flight, default=None)
+            for done in sorted(self._finished):
+                if oldest_in_flight is not None and done > oldest_in_flight:
+                    break
+                # delivered under the lock, so two workers can't deliver out of order
+                self._deliver(*self._finished.pop(done))
+
+
+class DecodeEngine:
+    """Runs the detector on its own worker thread(s), fed by a single slot mailbox.
+
+    `submit` is called on the capture thread and only swaps the mailbox slot, so the camera is
+    read at its native rate regardless of how long a decode takes. With several workers,
+    successive frames are decoded concurrently and the results still reach the result callback
+    in capture order.
+
+    Several capture sources can submit at once. Each gets its own result order, and the workers
+    take from the sources in turn. Every worker gets its own detector per source from
+    `detector_factory`: detectors keep per-camera state from one frame to the next, which has to
+    be updated in capture order, and a worker decodes the frames of a source in that order.
+
+    With `min_sharpness` set, frames whose `sharpness_score` is below it are passed on without
+    being decoded. With `prefer_sharpest`, the sharpest waiting frame is decoded instead of the
+    latest one.
+    """
+
+    def __init__(
+        self,
+        detector_factory: Callable[[], T_DETECTOR],
+        workers: int = 1,
+        min_sharpness: float = 0.0,
+        prefer_sharpest: bool = False,
+    ) -> None:
+        self._detector_factory: Callable[[], T_DETECTOR] = detector_factory
+        self._sources_lock: threading.Lock = threading.Lock()
+        self._detectors: dict[tuple[str, int], T_DETECTOR] = {}
+        "Keyed by source and worker index."
+        self._sequencers: dict[str, ResultSequencer] = {}
+        self._workers_count: int = max(1, workers)
+        self._min_sharpness: float = min_sharpness
+        self._score_frames: bool = min_sharpness > 0 or prefer_sharpest
+        self._result_callback: T_RESULT_CALLBACK | None = None
+        self._mailbox: LatestFrameMailbox = (
+            SharpestFrameMailbox() if prefer_sharpest else LatestFrameMailbox()
+        )
+        self._sequence: int = 0
+        self._workers: list[threading.Thread] = []
+        self._stats_lock: threading.Lock = threading.Lock()
+        self._submitted: int = 0
+        self._decoded: int = 0
+        self._blurred: int = 0
+        self._last_stats_log: float = time.perf_counter()
+
+    def set_result_callback(self, func: T_RESULT_CALLBACK | None) -> None:
+        self._result_callback = func
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        logger.info(f"Starting decode engine with {self._workers_count} worker(s)")
+        self._mailbox.open()
+        for i in range(self._workers_count):
+            worker = threading.Thread(
+                target=self._work, args=(i,), name=f"Decode Worker {i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        logger.info("Stopping decode engine")
+        self._mailbox.close()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        with self._sources_lock:
+            detectors = list(self._detectors.values())
+            self._detectors.clear()
+        for detector in detectors:
+            # detectors holding threads (the pipeline's tile pool) let them go
+            if (close := getattr(detector, "close", None)) is not None:
+                close()
+
+    def submit(self, frame: MatLike, source: str = "") -> None:
+        """Hands a frame of `source` to the decode workers. Never blocks on decoding. Pooled
+        frames are retained until their result is delivered."""
+        with self._stats_lock:
+            self._submitted += 1
+            self._sequence += 1
+            sequence = self._sequence
+        score = sharpness_score(frame) if self._score_frames else None
+        retain(frame)
+        self._mailbox.put(MailboxItem(frame, score, sequence, source))
+
+    def wants_frame(self, source: str = "") -> bool:
+        """Whether a frame of `source` submitted now would be decoded right away. Capturers use
+        it to skip retrieving frames that would only be dropped. Always true when preferring the
+        sharpest frame, since every frame has to be scored."""
+        return self._mailbox.wants_item(source)
+
+    def _sequencer(self, source: str) -> ResultSequencer:
+        with self._sources_lock:
+            if source not in self._sequencers:
+                logger.info(f'New capture source: "{source}"')
+                self._sequencers[source] = ResultSequencer(partial(self._deliver, source))
+            return self._sequencers[source]
+
+    def _detector(self, source: str, worker: int) -> T_DETECTOR:
+        with self._sources_lock:
+            if (source, worker) not in self._detectors:
+                self._detectors[(source, worker)] = self._detector_factory()
+            return self._detectors[(source, worker)]
+
+    def _on_take(self, item: MailboxItem) -> None:
+        self._sequencer(item.source).started(item.sequence)
+
+    def _work(self, worker: int) -> None:
+        while (item := self._mailbox.take(self._on_take)) is not None:
+            detector = self._detector(item.source, worker)
+            sequencer = self._sequencer(item.source)
+            if item.score is not None and item.score < self._min_sharpness:
+                # too blurred to read, still pass it on to be displayed
+                blurred = True
+                detections = []
+            else:
+                blurred = False
+                try:
+                    detections = detector(item.frame)
+                except Exception:
+                    # the result still has to be delivered, later results of the source wait for it
+                    logger.exception(f'Decoding a frame of "{item.source}" failed')
+                    detections = []
+
+            sequencer.finished(item.sequence, detections, item.frame)
+            self._count_decoded(blurred)
+
+    def _deliver(self, source: str, detections: list[Detection], frame: MatLike) -> None:
+        callback = self._result_callback
+        try:
+            if callback is not None:
+                callback(detections, frame, source)
+        except Exception:
+            logger.exception(f'Handling the result of "{source}" failed')
+        finally:
+            release(frame)
+
+    def _count_decoded(self, blurred: bool) -> None:
+        with self._stats_lock:
+            if blurred:
+                self._blurred += 1
+            else:
+                self._decoded += 1
+            now = time.perf_counter()
+            elapsed = now - self._last_stats_log
+            if elapsed < STATS_LOG_INTERVAL:
+                return
+            logger.debug(
+                f"Decode engine: {self._submitted / elapsed:.1f} frames/s captured, "
+                f"{self._decoded / elapsed:.1f} frames/s decoded, "
+                f"{self._mailbox.dropped} waiting frames dropped, "
+                f"{self._blurred} blurred frames not decoded"
+            )
+            self._submitted = 0
+            self._decoded = 0
+            self._blurred = 0
+            self._mailbox.dropped = 0
+            self._last_stats_log = now
@@ -0,0 +1,129 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import override
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from detect_code import Rect
+
+__all__ = ["GradientLocalizer", "LOCALIZERS", "Localizer", "OpenCVLocalizer", "get_localizer"]
+
+WORK_WIDTH: int = 640
+"Width the image is downscaled to before looking for candidates."
+
+
+class Localizer(ABC):
+    """Proposes regions of a grayscale image that may contain a barcode, without decoding them.
+    The decoder then only runs on those crops."""
+
+    name: str = ""
+    "Name used to select the localizer in the configs."
+
+    def __init__(self, padding: float = 0.15, max_candidates: int = 8) -> None:
+        self.padding: float = padding
+        "Padding added around each candidate, as a fraction of its size."
+        self.max_candidates: int = max_candidates
+
+    def locate(self, gray: MatLike) -> list[Rect]:
+        "Returns padded candidate rects in `gray`'s coordinates, largest first."
+        height, width = gray.shape[:2]
+        scale = min(1.0, WORK_WIDTH / width)
+        small = (
+            gray
+            if scale == 1.0
+            else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        )
+
+        rects: list[Rect] = []
+        for x, y, w, h in self._candidates(small):
+            pad_x, pad_y = w * self.padding, h * self.padding
+            left = max(0, int((x - pad_x) / scale))
+            top = max(0, int((y - pad_y) / scale))
+            right = min(width, int((x + w + pad_x) / scale))
+            bottom = min(height, int((y + h + pad_y) / scale))
+            rects.append((left, top, right - left, bottom - top))
+
+        rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+        return rects[: self.max_candidates]
+
+    @abstractmethod
+    def _candidates(self, small: MatLike) -> list[Rect]:
+        "Returns unpadded candidate rects in the downscaled image."
+
+
+class GradientLocalizer(Localizer):
+    """Classic gradient and morphology localization: barcodes are dense patches of strong edges.
+    Works for linear and 2D codes in any orientation."""
+
+    name: str = "gradient"
+
+    MIN_AREA_FRACTION: float = 0.002
+    "Candidates smaller than this fraction of the image are ignored."
+
+    @override
+    def _candidates(self, small: MatLike) -> list[Rect]:
+        gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+        gradient = cv2.blur(gradient, (7, 7))
+        _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+        # drop thin edges of ordinary objects, keep the dense blobs
+        mask = cv2.erode(mask, None, iterations=3)
+        mask = cv2.dilate(mask, None, iterations=3)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = small.shape[0] * small.shape[1] * self.MIN_AREA_FRACTION
+        rects: list[Rect] = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= min_area:
+                rects.append((int(x), int(y), int(w), int(h)))
+        return rects
+
+
+class OpenCVLocalizer(Localizer):
+    """Uses the detection half of `cv2.barcode.BarcodeDetector` and `cv2.QRCodeDetector`. Each
+    thread gets its own detector instances, they are not thread safe."""
+
+    name: str = "opencv"
+
+    def __init__(self, padding: float = 0.15, max_candidates: int = 8) -> None:
+        super().__init__(padding, max_candidates)
+        self._local: threading.local = threading.local()
+
+    @override
+    def _candidates(self, small: MatLike) -> list[Rect]:
+        if (detectors := getattr(self._local, "detectors", None)) is None:
+            detectors = self._local.detectors = (
+                cv2.barcode.BarcodeDetector(),
+                cv2.QRCodeDetector(),
+            )
+        barcode_detector, qr_detector = detectors
+
+        rects: list[Rect] = []
+        ok, points = barcode_detector.detect(small)
+        if ok and points is not None:
+            rects.extend(_bounding_rects(points))
+        ok, points = qr_detector.detectMulti(small)
+        if ok and points is not None:
+            rects.extend(_bounding_rects(points))
+        return rects
+
+
+def _bounding_rects(points: MatLike) -> list[Rect]:
+    rects: list[Rect] = []
+    for corners in np.asarray(points, dtype=np.float32).reshape(-1, 4, 2):
+        x, y, w, h = cv2.boundingRect(corners.astype(np.int32))
+        rects.append((int(x), int(y), int(w), int(h)))
+    return rects
+
+
+LOCALIZERS: tuple[type[Localizer], ...] = (GradientLocalizer, OpenCVLocalizer)
+
+
+def get_localizer(name: str) -> Localizer:
+    for localizer in LOCALIZERS:
+        if localizer.name == name:
+            return localizer()
+    raise Exception(f'Unknown localizer: "{name}"')
@@ -0,0 +1,239 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cv2.typing import MatLike
+
+from configs import (
+    BATCH_MODE,
+    CALIBRATION_FRAMES,
+    CHANGE_GATING,
+    CHANGE_THRESHOLD,
+    DECODER_BACKEND,
+    FORCED_DECODE_INTERVAL,
+    LOCALIZATION,
+    PYRAMID_SCALES,
+    ROI_FULL_SCAN_INTERVAL,
+    ROI_MARGIN,
+    ROI_TRACKING,
+    SYMBOLOGIES,
+    TILE_OVERLAP,
+    TILE_SIZE,
+    TILE_WORKERS,
+    TILED_DECODE,
+    configs,
+)
+from detect_code import Detection, Rect, sort_spatially
+from dirty_regions import get_dirty_regions, mark_decoded
+
+from .backends import DecoderBackend, get_backend
+from .calibration import BackendCalibrator
+from .change_gate import ChangeGate
+from .decode_engine import resolve_worker_count
+from .localizer import Localizer, get_localizer
+from .preprocess import crop, decode_pyramid, to_gray
+from .roi_tracker import RoiTracker
+from .stage_timer import StageTimer
+from .tiling import TiledBackend, intersects, merge_detections
+
+__all__ = ["DetectionPipeline"]
+
+
+class DetectionPipeline:
+    """The detector handed to `DecodeEngine`. Keeps the state that detection carries from one
+    frame to the next. Frames are only read, never modified."""
+
+    def __init__(self) -> None:
+        self.timer: StageTimer = StageTimer()
+        self._roi_tracker: RoiTracker = RoiTracker(
+            margin=configs[ROI_MARGIN],
+            full_scan_interval=configs[ROI_FULL_SCAN_INTERVAL],
+        )
+        self._backends_lock: threading.Lock = threading.Lock()
+        self._backends: dict[str, DecoderBackend] = {}
+        self._tiled_backends: dict[str, TiledBackend] = {}
+        self._tile_executor: ThreadPoolExecutor | None = None
+        self._localizers: dict[str, Localizer] = {}
+        self._calibrator: BackendCalibrator = BackendCalibrator(configs[CALIBRATION_FRAMES])
+        self._change_gate: ChangeGate = ChangeGate(
+            threshold=configs[CHANGE_THRESHOLD],
+            forced_interval=configs[FORCED_DECODE_INTERVAL],
+        )
+        self._last_detections: list[Detection] = []
+
+    def __call__(self, frame: MatLike) -> list[Detection]:
+        if (dirty_regions := get_dirty_regions(frame)) is not None:
+            # the capturer already knows what changed, e.g. a screen capture
+            with self.timer.measure("total"):
+                detections = self._decode_dirty(frame, dirty_regions)
+            mark_decoded(frame)
+            detections = sort_spatially(detections)
+            self._last_detections = detections
+            return detections
+
+        if configs[CHANGE_GATING]:
+            with self.timer.measure("change gate"):
+                changed = self._change_gate.should_decode(frame)
+            if not changed:
+                # nothing moved since the last decode, so its results still hold
+                self.timer.count("unchanged frames skipped")
+                return self._last_detections
+
+        # a batch is a whole sheet of labels, every one of them has to be read every time
+        batch = configs[BATCH_MODE]
+        track = configs[ROI_TRACKING] and not batch
+        region = None
+        if track:
+            height, width = frame.shape[:2]
+            region = self._roi_tracker.next_region(width, height)
+
+        backend = self._backend()
+        symbologies = None if (s := configs[SYMBOLOGIES]) == "all" else s
+        scales = _scales(batch)
+        localization = configs[LOCALIZATION]
+        with self.timer.measure("total"):
+            detections = self._decode(
+                frame, region, localization, scales, backend, symbologies, batch
+            )
+            if region is not None and not detections:
+                # the codes moved or new ones showed up elsewhere, read the whole frame now
+                # rather than ignoring them until the next scheduled full scan
+                self.timer.count("tracked region misses")
+                region = None
+                detections = self._decode(
+                    frame, region, localization, scales, backend, symbologies, batch
+                )
+
+        if track:
+            self._roi_tracker.update([detection.rect for detection in detections])
+
+        if configs[DECODER_BACKEND] == "auto" and not self._calibrator.calibrated:
+            if detections:
+                self._calibrator.add(to_gray(crop(frame, region)), symbologies)
+            elif self._calibrator.sample_miss():
+                self._calibrator.add_miss(to_gray(crop(frame, region)), symbologies)
+
+        detections = sort_spatially(detections)
+        self._last_detections = detections
+        return detections
+
+    def close(self) -> None:
+        "Shuts down the tile threads. Called by the decode engine when it stops."
+        with self._backends_lock:
+            executor, self._tile_executor = self._tile_executor, None
+            self._tiled_backends.clear()
+        if executor is not None:
+            executor.shutdown()
+
+    def _decode(
+        self,
+        frame: MatLike,
+        region: Rect | None,
+        localization: str,
+        scales: list[float],
+        backend: DecoderBackend,
+        symbologies: list[str] | None,
+        batch: bool,
+    ) -> list[Detection]:
+        "Decodes `region`, or the whole frame through the localizer when it's on."
+        if region is None and localization != "off":
+            return self._decode_candidates(frame, localization, scales, backend, symbologies, batch)
+        return decode_pyramid(frame, region, scales, self.timer, backend, symbologies, batch)
+
+    def _decode_dirty(self, frame: MatLike, regions: list[Rect]) -> list[Detection]:
+        """Decodes only the changed regions of the frame. Earlier detections outside them still
+        hold; a region touching an earlier detection is grown to cover it, so it's decoded whole.
+        """
+        regions = list(regions)
+        kept: list[Detection] = []
+        for detection in self._last_detections:
+            touched = [i for i, region in enumerate(regions) if intersects(region, detection.rect)]
+            if not touched:
+                kept.append(detection)
+            for i in touched:
+                regions[i] = _union(regions[i], detection.rect)
+
+        self.timer.count("dirty regions", len(regions))
+        backend = self._backend()
+        symbologies = None if (s := configs[SYMBOLOGIES]) == "all" else s
+        batch = configs[BATCH_MODE]
+        scales = _scales(batch)
+        detections: list[Detection] = []
+        for region in regions:
+            detections.extend(
+                decode_pyramid(frame, region, scales, self.timer, backend, symbologies, batch)
+            )
+        # grown regions may overlap and find the same code twice
+        return merge_detections(kept + detections)
+
+    def _decode_candidates(
+        self,
+        frame: MatLike,
+        localization: str,
+        scales: list[float],
+        backend: DecoderBackend,
+        symbologies: list[str] | None,
+        every_scale: bool = False,
+    ) -> list[Detection]:
+        "Decodes only the regions the localizer proposes. No proposals means no decoding at all."
+        with self.timer.measure("grayscale"):
+            gray = to_gray(frame)
+        with self.timer.measure("localize"):
+            candidates = self._localizer(localization).locate(gray)
+
+        if not candidates:
+            self.timer.count("frames without candidates")
+            return []
+
+        detections: list[Detection] = []
+        for candidate in candidates:
+            detections.extend(
+                decode_pyramid(
+                    gray, candidate, scales, self.timer, backend, symbologies, every_scale
+                )
+            )
+        # candidates may overlap and find the same code twice
+        return merge_detections(detections)
+
+    def _localizer(self, name: str) -> Localizer:
+        with self._backends_lock:
+            if name not in self._localizers:
+                self._localizers[name] = get_localizer(name)
+            return self._localizers[name]
+
+    def _backend(self) -> DecoderBackend:
+        name = configs[DECODER_BACKEND]
+        # decode workers may ask concurrently, create each backend only once
+        with self._backends_lock:
+            if name == "auto":
+                backend = self._calibrator.selected
+            else:
+                if name not in self._backends:
+                    self._backends[name] = get_backend(name)
+                backend = self._backends[name]
+
+            if not configs[TILED_DECODE]:
+                return backend
+
+            if self._tile_executor is None:
+                self._tile_executor = ThreadPoolExecutor(
+                    resolve_worker_count(configs[TILE_WORKERS]), thread_name_prefix="Decode Tile"
+                )
+            if backend.name not in self._tiled_backends:
+                self._tiled_backends[backend.name] = TiledBackend(
+                    backend, self._tile_executor, configs[TILE_SIZE], configs[TILE_OVERLAP]
+                )
+            return self._tiled_backends[backend.name]
+
+
+def _scales(batch: bool) -> list[float]:
+    "The pyramid scales to decode at. A batch always includes full resolution, for small labels."
+    scales = configs[PYRAMID_SCALES] or [1.0]
+    if batch and not any(scale >= 1.0 for scale in scales):
+        scales = [*scales, 1.0]
+    return scales
+
+
+def _union(a: Rect, b: Rect) -> Rect:
+    left, top = min(a[0], b[0]), min(a[1], b[1])
+    right, bottom = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (left, top, right - left, bottom - top)
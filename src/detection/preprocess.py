@@ -0,0 +1,74 @@
+import cv2
+from cv2.typing import MatLike
+
+from detect_code import Detection, Rect
+
+from .backends import DecoderBackend
+from .stage_timer import StageTimer
+from .tiling import merge_detections
+
+__all__ = ["crop", "decode_pyramid", "to_gray"]
+
+
+def to_gray(frame: MatLike) -> MatLike:
+    "Returns a single channel image. Frames that already are single channel are returned as is."
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def crop(frame: MatLike, region: Rect | None) -> MatLike:
+    "Returns a view (no copy) of `region` of the frame."
+    if region is None:
+        return frame
+    x, y, w, h = region
+    return frame[y : y + h, x : x + w]
+
+
+def decode_pyramid(
+    frame: MatLike,
+    region: Rect | None,
+    scales: list[float],
+    timer: StageTimer,
+    backend: DecoderBackend,
+    symbologies: list[str] | None = None,
+    every_scale: bool = False,
+) -> list[Detection]:
+    """Converts the (cropped) frame to grayscale once, then decodes it at each scale in order,
+    stopping at the first scale that finds anything. Rects are mapped back to frame coordinates.
+
+    With `every_scale`, all scales are decoded and their results merged, e.g. for a sheet of
+    labels where a small scale reads only the large ones.
+    """
+    offset_x, offset_y = (region[0], region[1]) if region is not None else (0, 0)
+
+    with timer.measure("grayscale"):
+        gray = to_gray(crop(frame, region))
+
+    detections: list[Detection] = []
+    for scale in scales:
+        if scale >= 1.0:
+            image = gray
+        else:
+            with timer.measure(f"resize x{scale}"):
+                image = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        with timer.measure(f"decode x{scale}"):
+            barcodes = backend.decode(image, symbologies)
+
+        if barcodes:
+            timer.count(f"hits x{scale}")
+            detections.extend(
+                barcode._replace(rect=_to_frame_rect(barcode.rect, scale, offset_x, offset_y))
+                for barcode in barcodes
+            )
+            if not every_scale:
+                return detections
+
+    # the same code is usually read at more than one scale
+    return merge_detections(detections) if every_scale else detections
+
+
+def _to_frame_rect(rect: Rect, scale: float, offset_x: int, offset_y: int) -> Rect:
+    x, y, w, h = rect
+    return int(x / scale) + offset_x, int(y / scale) + offset_y, int(w / scale), int(h / scale)
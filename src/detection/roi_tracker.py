@@ -0,0 +1,56 @@
+import threading
+
+from detect_code import Rect
+
+__all__ = ["RoiTracker"]
+
+
+class RoiTracker:
+    """Remembers where the last barcodes were found, so later frames can be decoded only around
+    that region.
+
+    A full frame scan is still done every `full_scan_interval` frames (to pick up codes appearing
+    elsewhere). When the tracked region misses, the caller scans the full frame right away and
+    reports that instead.
+    """
+
+    def __init__(self, margin: float, full_scan_interval: int) -> None:
+        self.margin: float = margin
+        "Padding added around the last hits, as a fraction of their size."
+        self.full_scan_interval: int = full_scan_interval
+
+        self._lock: threading.Lock = threading.Lock()
+        self._region: Rect | None = None
+        self._frames_since_full_scan: int = 0
+
+    def next_region(self, frame_width: int, frame_height: int) -> Rect | None:
+        "Returns the region to decode in the next frame. `None` means scan the full frame."
+        with self._lock:
+            if self._region is None or self._frames_since_full_scan >= self.full_scan_interval:
+                self._frames_since_full_scan = 0
+                return None
+
+            self._frames_since_full_scan += 1
+            x, y, w, h = self._region
+            pad_x, pad_y = int(w * self.margin), int(h * self.margin)
+            left, top = max(0, x - pad_x), max(0, y - pad_y)
+            right = min(frame_width, x + w + pad_x)
+            bottom = min(frame_height, y + h + pad_y)
+            return left, top, right - left, bottom - top
+
+    def update(self, hits: list[Rect]) -> None:
+        "Records where the last decode found codes. No hits stops tracking until the next ones."
+        with self._lock:
+            if not hits:
+                self._region = None
+                return
+            left = min(x for x, _, _, _ in hits)
+            top = min(y for _, y, _, _ in hits)
+            right = max(x + w for x, _, w, _ in hits)
+            bottom = max(y + h for _, y, _, h in hits)
+            self._region = (left, top, right - left, bottom - top)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._region = None
+            self._frames_since_full_scan = 0
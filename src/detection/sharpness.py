@@ -0,0 +1,19 @@
+import cv2
+from cv2.typing import MatLike
+
+from .preprocess import to_gray
+
+__all__ = ["sharpness_score"]
+
+SCORE_WIDTH: int = 320
+"Width the frame is downscaled to before scoring."
+
+
+def sharpness_score(frame: MatLike) -> float:
+    """Variance of the Laplacian of a downscaled grayscale copy of the frame. Higher is sharper;
+    motion blurred frames score low."""
+    height, width = frame.shape[:2]
+    if width > SCORE_WIDTH:
+        size = (SCORE_WIDTH, max(1, height * SCORE_WIDTH // width))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(to_gray(frame), cv2.CV_32F).var())
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+__all__ = ["StageTimer"]
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Accumulates the time spent in each named stage of the detection pipeline and periodically
+    logs the per-call averages."""
+
+    def __init__(self, log_interval: float = 5.0) -> None:
+        self.log_interval: float = log_interval
+        self._lock: threading.Lock = threading.Lock()
+        self._totals: dict[str, float] = defaultdict(float)
+        self._calls: dict[str, int] = defaultdict(int)
+        self._counters: dict[str, int] = defaultdict(int)
+        self._last_log: float = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._totals[stage] += elapsed
+                self._calls[stage] += 1
+            self._maybe_log()
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        "Bumps a plain counter that is logged along with the stage timings."
+        with self._lock:
+            self._counters[counter] += amount
+
+    def snapshot(self) -> dict[str, tuple[int, float]]:
+        "Returns `{stage: (calls, average seconds)}` since the last log."
+        with self._lock:
+            return {
+                stage: (calls, self._totals[stage] / calls)
+                for stage, calls in self._calls.items()
+                if calls
+            }
+
+    def _maybe_log(self) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            if now - self._last_log < self.log_interval:
+                return
+            stages = ", ".join(
+                f"{stage}: {self._totals[stage] / calls * 1000:.2f}ms x{calls}"
+                for stage, calls in self._calls.items()
+                if calls
+            )
+            counters = ", ".join(f"{name}: {value}" for name, value in self._counters.items())
+            self._totals.clear()
+            self._calls.clear()
+            self._counters.clear()
+            self._last_log = now
+        logger.debug(f"Stage timings: {stages}" + (f" | {counters}" if counters else ""))
@@ -0,0 +1,89 @@
+from concurrent.futures import Executor, Future
+from typing import override
+
+from cv2.typing import MatLike
+
+from detect_code import Detection, Rect
+
+from .backends import DecoderBackend
+
+__all__ = ["TiledBackend", "intersects", "merge_detections", "split_tiles"]
+
+
+def split_tiles(width: int, height: int, tile_size: int, overlap: int) -> list[Rect]:
+    """Splits a `width` x `height` image into tiles of at most `tile_size` that overlap their
+    neighbours by `overlap` pixels. A code no larger than `overlap` is always whole in some tile.
+    """
+    step = max(1, tile_size - overlap)
+
+    def starts(length: int) -> list[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def intersects(a: Rect, b: Rect) -> bool:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def merge_detections(detections: list[Detection]) -> list[Detection]:
+    """Drops duplicates of the same code found in overlapping tiles. Of the duplicates, the one
+    with the best quality (then the largest rect, i.e. the least cut off) is kept."""
+    ranked = sorted(detections, key=lambda d: (d.quality, d.rect[2] * d.rect[3]), reverse=True)
+    merged: list[Detection] = []
+    for detection in ranked:
+        duplicate = any(
+            kept.data == detection.data
+            and kept.symbology == detection.symbology
+            and intersects(kept.rect, detection.rect)
+            for kept in merged
+        )
+        if not duplicate:
+            merged.append(detection)
+    return merged
+
+
+class TiledBackend(DecoderBackend):
+    """Wraps a backend to decode images larger than `tile_size` as overlapping tiles in parallel.
+
+    Tiles run on a thread pool. pyzbar's ctypes calls and OpenCV's detectors release the GIL, so
+    threads scale across cores without the cost of copying tiles into other processes.
+    """
+
+    def __init__(
+        self, inner: DecoderBackend, executor: Executor, tile_size: int, overlap: int
+    ) -> None:
+        self.name: str = f"tiled {inner.name}"
+        self._inner: DecoderBackend = inner
+        self._executor: Executor = executor
+        self.tile_size: int = tile_size
+        self.overlap: int = overlap
+
+    @override
+    def decode(self, image: MatLike, symbologies: list[str] | None) -> list[Detection]:
+        height, width = image.shape[:2]
+        tiles = split_tiles(width, height, self.tile_size, self.overlap)
+        if len(tiles) == 1:
+            return self._inner.decode(image, symbologies)
+
+        futures: list[tuple[int, int, Future[list[Detection]]]] = []
+        for x, y, w, h in tiles:
+            tile = image[y : y + h, x : x + w]
+            futures.append((x, y, self._executor.submit(self._inner.decode, tile, symbologies)))
+
+        detections: list[Detection] = []
+        for x, y, future in futures:
+            for detection in future.result():
+                dx, dy, dw, dh = detection.rect
+                detections.append(detection._replace(rect=(dx + x, dy + y, dw, dh)))
+        return merge_detections(detections)
@@ -0,0 +1,82 @@
+from collections.abc import Callable
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+__all__ = [
+    "DirtyFrame",
+    "find_dirty_regions",
+    "get_dirty_regions",
+    "mark_decoded",
+    "with_dirty_regions",
+]
+
+T_RECT = tuple[int, int, int, int]
+"x, y, width, height"
+
+
+class DirtyFrame(np.ndarray):
+    """A frame that knows which parts of it changed since the last decoded frame of its source.
+    The detection pipeline decodes only those parts and keeps its earlier results elsewhere."""
+
+    dirty_regions: list[T_RECT] | None = None
+    on_decoded: Callable[[], None] | None = None
+    """Called by the pipeline once the regions were decoded. Frames can be dropped on the way, so
+    this is how the capturer learns which frame the next regions have to be found against."""
+
+
+def with_dirty_regions(
+    frame: MatLike, regions: list[T_RECT], on_decoded: Callable[[], None] | None = None
+) -> DirtyFrame:
+    "Returns a view (no copy) of the frame carrying `regions`."
+    dirty = frame.view(DirtyFrame)
+    dirty.dirty_regions = regions
+    dirty.on_decoded = on_decoded
+    return dirty
+
+
+def get_dirty_regions(frame: MatLike) -> list[T_RECT] | None:
+    "The changed regions of a `DirtyFrame`, `None` for other frames (everything may have changed)."
+    return getattr(frame, "dirty_regions", None)
+
+
+def mark_decoded(frame: MatLike) -> None:
+    "Tells the capturer of a `DirtyFrame` that its regions were decoded."
+    if (on_decoded := getattr(frame, "on_decoded", None)) is not None:
+        on_decoded()
+
+
+def find_dirty_regions(previous: MatLike | None, frame: MatLike, block: int = 32) -> list[T_RECT]:
+    """Compares the frames in `block` sized squares and returns the bounding rects of each group
+    of touching changed squares, grown by one square so codes on the edge of a change are whole.
+    The whole frame is dirty when there is no comparable previous frame."""
+    height, width = frame.shape[:2]
+    if previous is None or previous.shape != frame.shape:
+        return [(0, 0, width, height)]
+
+    # channels side by side, so a square is `block` rows by `block * channels` values
+    channels = frame.shape[2] if frame.ndim == 3 else 1
+    changed = cv2.absdiff(previous, frame).reshape(height, width * channels)
+    rows, cols = -(-height // block), -(-width // block)
+    changed = cv2.copyMakeBorder(
+        changed,
+        0,
+        rows * block - height,
+        0,
+        (cols * block - width) * channels,
+        cv2.BORDER_CONSTANT,
+        value=0,
+    )
+    # max over the rows of each band of squares, then over the columns of each square
+    bands = changed.reshape(rows, block, -1).max(axis=1)
+    blocks = (bands.reshape(rows, cols, -1).max(axis=2) > 0).astype(np.uint8)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+    regions: list[T_RECT] = []
+    for x, y, w, h, _area in stats[1:count]:
+        left, top = max(0, (x - 1) * block), max(0, (y - 1) * block)
+        right = min(width, (x + w + 1) * block)
+        bottom = min(height, (y + h + 1) * block)
+        regions.append((int(left), int(top), int(right - left), int(bottom - top)))
+    return regions
@@ -11,6 +11,8 @@ else:
     resource_dir = "src/resources"
 
 CONFIG_FILE = Path.home() / "appdata" / "Local" / "Paste Bar Code" / "config.json"
+CAMERAS_CACHE_FILE = CONFIG_FILE.with_name("cameras.json")
+"Last camera enumeration, shown at startup while the cameras are enumerated again."
 
 RESOURCES_DIR = Path(resource_dir).absolute()
 
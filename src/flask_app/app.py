@@ -12,24 +12,32 @@ app: Flask = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
 callback: Callable[[MatLike], None] = lambda x: print(x.shape)
 
+
 def set_callback(_callback: Callable[[MatLike], None]) -> None:
     global callback
     callback = _callback
 
+
 @app.route("/")
 def index():
     return render_template("camera_stream.html")
 
 
+def decode_frame(data: bytes | str) -> MatLike | None:
+    """Decodes a frame sent by the page: the JPEG bytes of a blob, or a base64 data URL from
+    pages loaded before frames were sent as binary."""
+    if isinstance(data, str):
+        _, encoded = data.split(",", 1)
+        data = base64.b64decode(encoded)
+
+    # np.frombuffer wraps the received bytes without copying, imdecode reads straight from them
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
 @socketio.on("frame")
-def handle_frame(data: str):
-    # Data is base64 encoded image string
-    _, encoded = data.split(",", 1)
-    image_data = base64.b64decode(encoded)
-
-    # Convert to numpy/OpenCV image
-    np_img = np.frombuffer(image_data, np.uint8)
-    frame = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
+def handle_frame(data: bytes | str):
+    # Data is the JPEG encoded image, as binary
+    frame = decode_frame(data)
 
     # For example, we could display or process the frame:
     # print("Received frame:", frame.shape)
@@ -0,0 +1,88 @@
+import threading
+
+import numpy as np
+from cv2.typing import MatLike
+
+__all__ = ["FramePool", "PooledFrame", "release", "retain"]
+
+
+class PooledFrame(np.ndarray):
+    """A frame buffer owned by a `FramePool`. Views of it (slices, crops) are plain frames as far
+    as the pool is concerned, only the buffer itself is reference counted."""
+
+    _pool: "FramePool | None" = None
+
+
+class FramePool:
+    """Fixed-size ring of reusable frame buffers.
+
+    The capturer reads into a buffer from `acquire` instead of letting OpenCV allocate a new
+    multi-megabyte array per frame. Every consumer that keeps the frame past the frame callback
+    calls `retain` and later `release`; the buffer goes back to the pool when the count drops to
+    zero. When every buffer is in use `acquire` returns `None` and the caller allocates as before.
+    """
+
+    def __init__(self, size: int = 6) -> None:
+        self.size: int = size
+        self._lock: threading.Lock = threading.Lock()
+        self._free: list[PooledFrame] = []
+        self._refs: dict[int, int] = {}
+        "Reference counts of the buffers in use, keyed by `id`."
+        self._allocated: int = 0
+        "Buffers of the current shape, free or in use."
+        self._shape: tuple[tuple[int, ...], np.dtype[np.generic]] | None = None
+        self.reused: int = 0
+        "Acquires served from a free buffer."
+        self.misses: int = 0
+        "Acquires that found every buffer in use."
+
+    def acquire(self, shape: tuple[int, ...], dtype: np.dtype[np.generic]) -> PooledFrame | None:
+        "Returns a free buffer of `shape` with a reference count of 1, or `None` if none is free."
+        with self._lock:
+            if self._shape != (shape, dtype):
+                # the frame size changed, buffers in use are dropped when released
+                self._shape = (shape, dtype)
+                self._free.clear()
+                self._allocated = 0
+
+            if self._free:
+                buffer = self._free.pop()
+                self.reused += 1
+            elif self._allocated < self.size:
+                buffer = np.empty(shape, dtype).view(PooledFrame)
+                buffer._pool = self
+                self._allocated += 1
+            else:
+                self.misses += 1
+                return None
+
+            self._refs[id(buffer)] = 1
+            return buffer
+
+    def _retain(self, buffer: PooledFrame) -> None:
+        with self._lock:
+            self._refs[id(buffer)] += 1
+
+    def _release(self, buffer: PooledFrame) -> None:
+        with self._lock:
+            count = self._refs[id(buffer)] - 1
+            if count > 0:
+                self._refs[id(buffer)] = count
+                return
+            del self._refs[id(buffer)]
+            if self._shape == (buffer.shape, buffer.dtype):
+                self._free.append(buffer)
+
+
+def retain(frame: MatLike) -> None:
+    "Takes a reference to a pooled frame. Does nothing for other frames."
+    pool = getattr(frame, "_pool", None)
+    if pool is not None:
+        pool._retain(frame)  # pyright: ignore[reportPrivateUsage]
+
+
+def release(frame: MatLike) -> None:
+    "Drops a reference taken with `retain` or `FramePool.acquire`. Does nothing for other frames."
+    pool = getattr(frame, "_pool", None)
+    if pool is not None:
+        pool._release(frame)  # pyright: ignore[reportPrivateUsage]
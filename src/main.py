@@ -1,37 +1,92 @@
 import logging
 import sys
+from pathlib import Path
 
+from cv2.typing import MatLike
 from PySide6.QtWidgets import QApplication
 
-from capture_api import CaptureAPI
+from capture_api import CaptureAPI, LocalCapturer
+from configs import (
+    CAMERA_WATCH_INTERVAL,
+    CAPTURE_PROFILES,
+    CAPTURE_TARGET,
+    DECODE_WORKERS,
+    MIN_SHARPNESS,
+    PREFER_SHARPEST,
+    configs,
+)
+from detect_code import Detection
+from detection import DecodeEngine, DetectionPipeline, resolve_worker_count
 from ui import MainWindow
 from version import __version__
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-def main() -> int:
+def main(record: Path | None = None) -> int:
     app = QApplication(sys.argv)
 
     win = MainWindow()
     win.show()
 
+    decode_engine = DecodeEngine(
+        DetectionPipeline,
+        workers=resolve_worker_count(configs[DECODE_WORKERS]),
+        min_sharpness=configs[MIN_SHARPNESS],
+        prefer_sharpest=configs[PREFER_SHARPEST],
+    )
     capture_api = CaptureAPI()
-    capture_api.set_frame_callback(win.update_frame)
 
+    def on_result(detections: list[Detection], frame: MatLike, source: str) -> None:
+        if detections:
+            capture_api.report_activity(source)
+        win.update_frame(detections, frame, source)
+
+    decode_engine.set_result_callback(on_result)
+    decode_engine.start()
+
+    capture_api.set_frame_callback(decode_engine.submit)
+    capture_api.set_demand_callback(decode_engine.wants_frame)
+
+    # before listing the options, so a background refresh they start can't be missed
+    capture_api.set_options_changed_callback(win.update_capture_options)
     available_options = capture_api.get_options()
     win.set_capture_option_change_callback(capture_api.set_option)
+    win.set_extra_captures_change_callback(capture_api.set_extra_options)
     win.update_capture_options(available_options)
+    if configs[CAMERA_WATCH_INTERVAL] > 0:
+        capture_api.watch_options(configs[CAMERA_WATCH_INTERVAL])
+    if record is not None:
+        capture_api.start_recording(record)
     capture_api.start_capturing()
 
-    _ = app.aboutToQuit.connect(capture_api.stop_capturing)
+    _ = app.aboutToQuit.connect(capture_api.close)
+    _ = app.aboutToQuit.connect(decode_engine.stop)
 
     return app.exec()
 
 
+def probe_cameras() -> int:
+    "Probes the local cameras, saves the chosen capture profiles and prints them."
+    profiles = LocalCapturer.probe_profiles(configs[CAPTURE_TARGET])
+    configs[CAPTURE_PROFILES] = {**configs[CAPTURE_PROFILES], **profiles}
+    for option, profile in profiles.items():
+        print(f"{option}: {profile}")
+    return 0
+
+
 if __name__ == "__main__":
     if "--version" in sys.argv:
         print(__version__)
         sys.exit(0)
+    if "--probe-cameras" in sys.argv:
+        sys.exit(probe_cameras())
+    if "--record" in sys.argv:
+        # records what the pipeline is given, to replay with the File capturer
+        i = sys.argv.index("--record")
+        if i + 1 == len(sys.argv):
+            print("usage: main.py --record SESSION.pbrec")
+            sys.exit(2)
+        sys.exit(main(Path(sys.argv[i + 1])))
 
     sys.exit(main())
@@ -4,11 +4,10 @@ from collections.abc import Callable
 from functools import partial
 from typing import override
 
-import cv2
 import pyautogui
 from cv2.typing import MatLike
 from PySide6.QtCore import QPoint, QRect, QSize, Qt, Signal
-from PySide6.QtGui import QCloseEvent, QImage, QMouseEvent, QPixmap
+from PySide6.QtGui import QCloseEvent, QMouseEvent
 from PySide6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -18,9 +17,17 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from configs import LOCK_INTERVAL, PRESS_ENTER, configs
-from detect_code import detect_code
-from ui.widgets import DetectionIndicator, FrameLabel, TimerLineEditWidget
+from configs import (
+    BATCH_MODE,
+    EXTRA_CAPTURES,
+    LOCK_INTERVAL,
+    PRESS_ENTER,
+    SYMBOLOGIES,
+    configs,
+)
+from detect_code import SUPPORTED_SYMBOLOGIES, Detection
+from frame_pool import release, retain
+from ui.widgets import CheckableMenuButton, DetectionIndicator, FrameLabel, TimerLineEditWidget
 from version import __version__
 
 from .beep_sound import play_beep
@@ -29,14 +36,22 @@ logger = logging.getLogger(__name__)
 
 
 class MainWindow(QMainWindow):
-    _update_frame_signal: Signal = Signal(str, object)
+    _update_frame_signal: Signal = Signal(list, object, str)
     "To turn child thread's to main thread."
+    _update_capture_options_signal: Signal = Signal(list)
 
     def __init__(self) -> None:
         super().__init__()
 
-        self._last_code: str = ""
+        self._last_codes: dict[str, str] = {}
+        "Last code output from each capture source."
+        self._batch_codes: set[str] = set()
+        "Codes output in batch mode since the lock was last released."
         self._capture_option_change_callback: Callable[[str], None] | None = None
+        self._extra_captures_change_callback: Callable[[list[str]], None] | None = None
+        self._extra_sources: set[str] = set()
+        self._auto_selected: bool = False
+        "Whether the selected capture option was picked for the user rather than by them."
         self._mouse_pressed: QPoint | None = None
 
         self.setWindowTitle(f"Paste Bar Code - v{__version__}")
@@ -58,6 +73,7 @@ class MainWindow(QMainWindow):
         self._image_widget: FrameLabel = FrameLabel(self)
 
         self._indicator_widget: DetectionIndicator = DetectionIndicator(self)
+        _ = self._indicator_widget.lock_changed.connect(self._on_lock_change)
 
         self._interval_entry: TimerLineEditWidget = TimerLineEditWidget(self)
         self._interval_entry.setFixedSize(130, 40)
@@ -70,14 +86,37 @@ class MainWindow(QMainWindow):
             lambda: self._update_config(PRESS_ENTER, self._press_enter.isChecked())
         )
 
+        self._batch_mode: QCheckBox = QCheckBox(self)
+        self._batch_mode.setText("Batch")
+        self._batch_mode.setToolTip("Output every new code in the frame, top-to-bottom.")
+        _ = self._batch_mode.checkStateChanged.connect(
+            lambda: self._update_config(BATCH_MODE, self._batch_mode.isChecked())
+        )
+
+        self._symbologies_button: CheckableMenuButton = CheckableMenuButton("Codes", self)
+        self._symbologies_button.setFixedSize(60, 40)
+        self._symbologies_button.setToolTip("Symbologies to scan for. None checked scans all.")
+        self._symbologies_button.set_items(SUPPORTED_SYMBOLOGIES)
+        _ = self._symbologies_button.checked_items_changed.connect(self._on_symbologies_change)
+
         self._capture_options_combobox: QComboBox = QComboBox(self)
         _ = self._capture_options_combobox.currentTextChanged.connect(
             self._on_capture_option_change
         )
 
+        self._extra_captures_button: CheckableMenuButton = CheckableMenuButton("+Cams", self)
+        self._extra_captures_button.setFixedSize(60, 40)
+        self._extra_captures_button.setToolTip("More cameras to scan at the same time.")
+        _ = self._extra_captures_button.checked_items_changed.connect(
+            self._on_extra_captures_change
+        )
+
         self._buttons_layout: QHBoxLayout = QHBoxLayout()
         self._buttons_layout.addWidget(self._capture_options_combobox)
+        self._buttons_layout.addWidget(self._extra_captures_button)
         self._buttons_layout.addWidget(self._press_enter)
+        self._buttons_layout.addWidget(self._batch_mode)
+        self._buttons_layout.addWidget(self._symbologies_button)
         self._buttons_layout.addWidget(self._interval_entry)
         self._buttons_layout.addWidget(self._indicator_widget)
 
@@ -91,30 +130,63 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(central_widget)
 
         _ = self._update_frame_signal.connect(self._update_frame)
+        _ = self._update_capture_options_signal.connect(self.update_capture_options)
 
         self._update_options()
 
-    def update_frame(self, frame: MatLike) -> None:
-        code, _frame = detect_code(frame)
+    def update_frame(self, detections: list[Detection], _frame: MatLike, source: str = "") -> None:
+        """Receives decode results, sorted top-to-bottom, left-to-right. `source` is the extra
+        capture option the frame came from, or empty for the selected capture.
+        Safe to call from the decode worker threads."""
+        retain(_frame)  # released once displayed
         if threading.get_ident() != threading.main_thread().ident:
-            self._update_frame_signal.emit(code, _frame)
+            self._update_frame_signal.emit(detections, _frame, source)
         else:
-            self._update_frame(code, _frame)
+            self._update_frame(detections, _frame, source)
 
     def update_capture_options(self, options: list[str]) -> None:
+        """Lists the capture options. Can be called again when they change, the selected option
+        is kept if it is still there. Safe to call from other threads."""
+        if threading.get_ident() != threading.main_thread().ident:
+            self._update_capture_options_signal.emit(options)
+            return
+
         capture_config = configs["capture"]
-        self._capture_options_combobox.addItems(options)
-        option_index = 0
-        if capture_config != "auto" and capture_config in options:
-            for option_index in range(self._capture_options_combobox.count()):
-                if capture_config == self._capture_options_combobox.itemText(option_index):
-                    break
+        current = self._capture_options_combobox.currentText()
+        self._extra_captures_button.set_items(options)
+        self._extra_captures_button.set_checked_items(
+            [option for option in configs[EXTRA_CAPTURES] if option in options]
+        )
 
+        _ = self._capture_options_combobox.blockSignals(True)
+        self._capture_options_combobox.clear()
+        self._capture_options_combobox.addItems(options)
+        option_index = -1
+        if current in options and not self._auto_selected:
+            option_index = options.index(current)
+        elif capture_config != "auto" and capture_config in options:
+            option_index = options.index(capture_config)
+            self._auto_selected = False
+        elif options:
+            # e.g. the configured camera isn't found yet, picked again when the options change
+            option_index = 0
+            self._auto_selected = True
         self._capture_options_combobox.setCurrentIndex(option_index)
+        _ = self._capture_options_combobox.blockSignals(False)
+
+        selected = self._capture_options_combobox.currentText()
+        if selected and selected != current:
+            self._select_capture_option(selected)
+        else:
+            # drop extra captures that went away
+            self._apply_extra_captures(self._extra_captures_button.checked_items())
 
     def set_capture_option_change_callback(self, func: Callable[[str], None] | None) -> None:
         self._capture_option_change_callback = func
 
+    def set_extra_captures_change_callback(self, func: Callable[[list[str]], None] | None) -> None:
+        self._extra_captures_change_callback = func
+
     @override
     def closeEvent(self, event: QCloseEvent, /) -> None:
         geo_rect = self.geometry()
@@ -149,31 +221,85 @@ class MainWindow(QMainWindow):
     def _on_capture_off(self) -> None:
         raise NotImplementedError
 
-    def _update_frame(self, code: str, _frame: MatLike) -> None:
-        rgb_img = cv2.cvtColor(_frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_img.shape  # pyright: ignore[reportAny]
-        bytes_per_line = ch * w  # pyright: ignore[reportAny]
-        q_image = QImage(rgb_img.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)  # pyright: ignore[reportAny]
-        pixmap = QPixmap.fromImage(q_image)
-        self._image_widget.setPixmap(pixmap)
-        if code and not (self._indicator_widget.locked and code == self._last_code):
-            self._indicator_widget.code_detected(code)
-            if configs["play_beep"]:
-                play_beep()
+    def _update_frame(self, detections: list[Detection], _frame: MatLike, source: str) -> None:
+        if source and source not in self._extra_sources:
+            # still in flight when the extra capture was removed
+            release(_frame)
+            return
+
+        h, w = _frame.shape[:2]
+        self._image_widget.set_detections(detections, w, h, source)
+        try:
+            self._image_widget.set_frame(_frame, source)
+        finally:
+            release(_frame)
+        if not detections:
+            return
+
+        if configs[BATCH_MODE]:
+            codes: list[str] = []
+            for detection in detections:
+                if detection.data not in self._batch_codes and detection.data not in codes:
+                    codes.append(detection.data)
+            if codes:
+                self._output_codes(codes, source)
+                self._batch_codes.update(codes)
+        else:
+            code = detections[0].data
+            # compared with every source's last code, so a code seen by two cameras, or two
+            # codes seen by different cameras, are not output over and over while locked
+            last_codes = self._last_codes.values()
+            if code and not (self._indicator_widget.locked and code in last_codes):
+                self._output_codes([code], source)
+
+    def _output_codes(self, codes: list[str], source: str) -> None:
+        self._indicator_widget.code_detected(codes[-1])
+        if configs["play_beep"]:
+            play_beep()
+        for code in codes:
             if configs["type_code"]:
                 pyautogui.typewrite(code)
             if configs["press_enter"]:
                 pyautogui.press("enter")
-            self._last_code = code
+        self._last_codes[source] = codes[-1]
+
+    def _on_lock_change(self, locked: bool) -> None:
+        if not locked:
+            self._batch_codes.clear()
 
     def _change_timer(self, time: float) -> None:
         """Changes the time of interval timer. (seconds)"""
         self._indicator_widget.change_timer(int(time * 1000))
 
     def _on_capture_option_change(self, option: str) -> None:
+        "The user picked a capture option, it's remembered for the next start."
+        self._auto_selected = False
+        configs["capture"] = option
+        self._select_capture_option(option)
+
+    def _select_capture_option(self, option: str) -> None:
         if self._capture_option_change_callback is not None:
             self._capture_option_change_callback(option)
-        configs["capture"] = option
+        # the selected capture can't also be an extra one
+        self._apply_extra_captures(self._extra_captures_button.checked_items())
+
+    def _on_extra_captures_change(self, options: list[str]) -> None:
+        configs[EXTRA_CAPTURES] = options
+        self._apply_extra_captures(options)
+
+    def _apply_extra_captures(self, options: list[str]) -> None:
+        selected = self._capture_options_combobox.currentText()
+        extra_sources = {option for option in options if option != selected}
+        for source in self._extra_sources - extra_sources:
+            self._image_widget.remove_source(source)
+            _ = self._last_codes.pop(source, None)
+        self._extra_sources = extra_sources
+        if self._extra_captures_change_callback is not None:
+            self._extra_captures_change_callback(sorted(extra_sources))
+
+    def _on_symbologies_change(self, symbologies: list[str]) -> None:
+        all_checked = len(symbologies) == len(SUPPORTED_SYMBOLOGIES)
+        configs[SYMBOLOGIES] = "all" if not symbologies or all_checked else symbologies
 
     def _update_config(self, config: str, value: object) -> None:
         if config not in configs.keys():
@@ -186,4 +312,7 @@ class MainWindow(QMainWindow):
         "Updates the option widgets according to configs."
         self._interval_entry.setValue(configs["lock_interval"])
         self._press_enter.setChecked(configs["press_enter"])
+        self._batch_mode.setChecked(configs[BATCH_MODE])
+        symbologies = configs[SYMBOLOGIES]
+        self._symbologies_button.set_checked_items([] if symbologies == "all" else symbologies)
         self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint, configs["always_on_top"])
@@ -0,0 +1,48 @@
+from PySide6.QtCore import QPointF, QRect, QRectF, Qt
+from PySide6.QtGui import QColor, QPainter, QPen
+
+from detect_code import Detection
+
+__all__ = ["draw_detections"]
+
+BOX_COLOR: QColor = QColor(0, 255, 0)
+TEXT_COLOR: QColor = QColor(255, 255, 255)
+
+
+def draw_detections(
+    painter: QPainter,
+    detections: list[Detection],
+    source_width: int,
+    source_height: int,
+    target: QRect,
+    flipped: bool = False,
+) -> None:
+    """Draws the detection boxes and their decoded text over a frame displayed in `target`.
+
+    Rects are in the coordinates of the full size `source_width` x `source_height` frame and are
+    scaled here, so the drawing happens at display resolution and the frame itself is never
+    touched. `flipped` mirrors the boxes to match a horizontally flipped frame.
+    """
+    if not detections or source_width <= 0 or source_height <= 0:
+        return
+
+    scale_x = target.width() / source_width
+    scale_y = target.height() / source_height
+
+    painter.save()
+    font = painter.font()
+    font.setPointSize(9)
+    painter.setFont(font)
+    for detection in detections:
+        x, y, w, h = detection.rect
+        if flipped:
+            x = source_width - x - w
+        box = QRectF(target.x() + x * scale_x, target.y() + y * scale_y, w * scale_x, h * scale_y)
+
+        painter.setPen(QPen(BOX_COLOR, 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(box)
+
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(QPointF(box.left(), box.top() - 4), detection.data)
+    painter.restore()
@@ -1,6 +1,13 @@
 from ._button import Button
 from ._timer_line_edit_widget import TimerLineEditWidget
+from .checkable_menu_button import CheckableMenuButton
 from .detection_indicator import DetectionIndicator
 from .frame_label import FrameLabel
 
-__all__ = ["Button", "DetectionIndicator", "TimerLineEditWidget", "FrameLabel"]
+__all__ = [
+    "Button",
+    "CheckableMenuButton",
+    "DetectionIndicator",
+    "TimerLineEditWidget",
+    "FrameLabel",
+]
@@ -0,0 +1,47 @@
+from PySide6.QtCore import QPoint, Signal
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QMenu, QWidget
+
+from ._button import Button
+
+
+class CheckableMenuButton(Button):
+    """Button that pops a menu of checkable items. Emits `checked_items_changed` with the checked
+    item names whenever one is toggled."""
+
+    checked_items_changed: Signal = Signal(list)
+
+    def __init__(self, text: str | None = None, parent: QWidget | None = None) -> None:
+        super().__init__(text, parent)
+
+        self._menu: QMenu = QMenu(self)
+        self._actions: dict[str, QAction] = {}
+
+        _ = self.clicked.connect(self._show_menu)
+
+    def set_items(self, items: list[str]) -> None:
+        checked = self.checked_items()
+        self._menu.clear()
+        self._actions = {}
+        for item in items:
+            action = self._menu.addAction(item)
+            action.setCheckable(True)
+            action.setChecked(item in checked)
+            _ = action.toggled.connect(self._emit_checked_items)
+            self._actions[item] = action
+
+    def set_checked_items(self, items: list[str]) -> None:
+        "Checks exactly the given items, without emitting `checked_items_changed`."
+        for item, action in self._actions.items():
+            _ = action.blockSignals(True)
+            action.setChecked(item in items)
+            _ = action.blockSignals(False)
+
+    def checked_items(self) -> list[str]:
+        return [item for item, action in self._actions.items() if action.isChecked()]
+
+    def _emit_checked_items(self, _: bool) -> None:
+        self.checked_items_changed.emit(self.checked_items())
+
+    def _show_menu(self) -> None:
+        _ = self._menu.exec(self.mapToGlobal(QPoint(0, self.height())))
@@ -1,19 +1,30 @@
 import logging
+import math
 from typing import override
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPainter, QPainterPath, QPaintEvent, QPixmap
+import numpy as np
+from cv2.typing import MatLike
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QImage, QPainter, QPainterPath, QPaintEvent
 from PySide6.QtWidgets import QCheckBox, QLabel, QWidget
 
 from configs import configs
+from detect_code import Detection
+from ui.overlay import draw_detections
 
 logger = logging.getLogger(__name__)
 
 
 class FrameLabel(QLabel):
+    """Shows the latest frame of each capture source, tiled in a grid when there are several,
+    with the detections drawn over them."""
+
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
-        self._pixmap: QPixmap = QPixmap()
+        self._images: dict[str, QImage] = {}
+        "Latest frame of each source, in the order the sources first showed up."
+        self._detections: dict[str, tuple[list[Detection], int, int]] = {}
+        "Detections of each source, with the size of the frame their rects are in."
 
         self.setScaledContents(True)
         self.setMinimumSize(0, 0)
@@ -24,34 +35,86 @@ class FrameLabel(QLabel):
 
         self._update_options()
 
-    @override
-    def setPixmap(self, arg__1: QPixmap, /) -> None:  # pyright: ignore[reportIncompatibleMethodOverride]
-        self._pixmap = arg__1
+    def set_detections(
+        self, detections: list[Detection], frame_width: int, frame_height: int, source: str = ""
+    ) -> None:
+        """Sets the detections to overlay on the next painted frame of `source`. Rects are in the
+        coordinates of the `frame_width` x `frame_height` frame."""
+        self._detections[source] = (detections, frame_width, frame_height)
+
+    def set_frame(self, frame: MatLike, source: str = "") -> None:
+        """Copies a BGR or grayscale frame into the image of `source` and repaints. The image is
+        only reallocated when the frame size or format changes, and the frame is not kept."""
+        height, width = frame.shape[:2]
+        image_format = (
+            QImage.Format.Format_Grayscale8 if frame.ndim == 2 else QImage.Format.Format_BGR888
+        )
+        image = self._images.get(source)
+        if (
+            image is None
+            or image.width() != width
+            or image.height() != height
+            or image.format() != image_format
+        ):
+            image = self._images[source] = QImage(width, height, image_format)
+
+        # the label holds the only reference to the image, so bits() writes in place
+        row_bytes = frame[0].nbytes
+        rows = np.frombuffer(image.bits(), np.uint8).reshape(  # pyright: ignore[reportArgumentType]
+            height, image.bytesPerLine()
+        )
+        rows[:, :row_bytes] = np.asarray(frame).reshape(height, row_bytes)
+        self.repaint()
+
+    def remove_source(self, source: str) -> None:
+        "Stops showing the tile of `source`."
+        _ = self._images.pop(source, None)
+        _ = self._detections.pop(source, None)
         self.repaint()
 
     @override
     def paintEvent(self, arg__1: QPaintEvent, /) -> None:
-        image = self._pixmap.toImage()
-
-        if (
-            image.width() > self.contentsRect().width()
-            or image.height() > self.contentsRect().height()
-        ):
-            image = image.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        if not self._images:
+            return
 
-        if self._flip_toggle.isChecked():
-            image.flip(Qt.Orientation.Horizontal)
+        columns = math.ceil(math.sqrt(len(self._images)))
+        rows = math.ceil(len(self._images) / columns)
+        contents = self.contentsRect()
+        cell_width = contents.width() // columns
+        cell_height = contents.height() // rows
+        flipped = self._flip_toggle.isChecked()
 
         with QPainter(self) as p:
             p.setRenderHint(p.RenderHint.Antialiasing, True)
 
-            image_pos = self.contentsRect().center() - image.rect().center()
-            path = QPainterPath()
-            path.addRoundedRect(
-                image_pos.x(), image_pos.y(), image.size().width(), image.size().height(), 10, 10
-            )
-            p.setClipPath(path)
-            p.drawImage(image_pos, image)
+            for i, (source, image) in enumerate(self._images.items()):
+                cell = QRect(
+                    contents.x() + i % columns * cell_width,
+                    contents.y() + i // columns * cell_height,
+                    cell_width,
+                    cell_height,
+                )
+                if image.width() > cell.width() or image.height() > cell.height():
+                    image = image.scaled(cell.size(), Qt.AspectRatioMode.KeepAspectRatio)
+                if flipped:
+                    image = image.flipped(Qt.Orientation.Horizontal)
+
+                image_pos = cell.center() - image.rect().center()
+                path = QPainterPath()
+                path.addRoundedRect(
+                    image_pos.x(), image_pos.y(), image.width(), image.height(), 10, 10
+                )
+                p.setClipPath(path)
+                p.drawImage(image_pos, image)
+                detections, frame_width, frame_height = self._detections.get(source, ([], 0, 0))
+                draw_detections(
+                    p,
+                    detections,
+                    frame_width,
+                    frame_height,
+                    QRect(image_pos, image.size()),
+                    flipped=flipped,
+                )
 
     def _update_options(self) -> None:
         "Updates option widgets according to configs."